@@ -1,27 +1,18 @@
 from flask import Flask, jsonify, request
 from flask_cors import CORS
 from config import Config
-import logging
-from datetime import datetime
-from flask.json.provider import DefaultJSONProvider
-import json
 from app.extensions import db, migrate, jwt, mail, cache
 from app.api import bp as api_bp
-
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
-logger = logging.getLogger(__name__)
-
-class CustomJSONEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, datetime):
-            return obj.isoformat()
-        return super().default(obj)
+from app.utils.json_provider import FastJSONProvider
+from app.utils.log import init_logging
+from app.utils.metrics import init_metrics
+from app.utils.sql_stats import init_sql_instrumentation
 
 def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
-    app.json_encoder = CustomJSONEncoder
+    init_logging(app)
+    app.json = FastJSONProvider(app)
 
     # Initialize extensions
     CORS(app)
@@ -30,6 +21,8 @@ def create_app(config_class=Config):
     jwt.init_app(app)
     mail.init_app(app)
     cache.init_app(app)
+    init_sql_instrumentation(app)
+    init_metrics(app)
 
     # Register blueprints
     from app.auth import bp as auth_bp
@@ -59,7 +52,6 @@ def create_app(config_class=Config):
 
     @app.route('/test')
     def test():
-        print("Flask application is working!")
         return jsonify({'message': 'Flask application is working!'})
 
     # Create database tables
@@ -1,18 +1,21 @@
 from flask import Blueprint, request, jsonify, flash, send_file
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.models import User, Service, ServiceRequest
+from app.models import User, Service, ServiceRequest, Counter, ExportWatermark
 from app.extensions import db, cache
 from functools import wraps
 from app.admin import bp
 from app.auth.routes import role_required
 from app.decorators import admin_required
 from app.tasks import generate_service_requests_csv
+from app.utils.cache_tags import cached_response
+from app.utils.fields import requested_columns
+from app.utils.pagination import PaginationError, pagination_requested, paginate, page_response
+from app.utils.streaming import stream_json_array
 from datetime import datetime
 
-from app.extensions import cache
-from app.tasks import generate_service_requests_csv
-from io import BytesIO
-import csv
+from app.utils.exports import (
+    ExportError, claim_export, export_fingerprint, export_params, find_export, release_export_claim
+)
 
 @bp.route('/test', methods=['GET'])
 def test():
@@ -21,24 +24,19 @@ def test():
 
 @bp.route('/dashboard', methods=['GET'])
 @admin_required
-@cache.cached()
+@cached_response('requests:all', 'users:all', 'services:all')
 def get_dashboard():
-    total_users = User.query.count()
-    total_professionals = User.query.filter_by(role='professional').count()
-    total_customers = User.query.filter_by(role='customer').count()
-    total_services = Service.query.count()
-    total_requests = ServiceRequest.query.count()
-    pending_requests = ServiceRequest.query.filter_by(status='pending').count()
-    completed_requests = ServiceRequest.query.filter_by(status='completed').count()
+    # Maintained incrementally by write hooks, so this is a single small SELECT
+    counters = Counter.values()
     
     return jsonify({
-        'total_users': total_users,
-        'total_professionals': total_professionals,
-        'total_customers': total_customers,
-        'total_services': total_services,
-        'total_requests': total_requests,
-        'pending_requests': pending_requests,
-        'completed_requests': completed_requests
+        'total_users': counters.get('users', 0),
+        'total_professionals': counters.get('users:role:professional', 0),
+        'total_customers': counters.get('users:role:customer', 0),
+        'total_services': counters.get('services', 0),
+        'total_requests': counters.get('service_requests', 0),
+        'pending_requests': counters.get('service_requests:status:pending', 0),
+        'completed_requests': counters.get('service_requests:status:completed', 0)
     }), 200
 
 @bp.route('/services', methods=['GET'])
@@ -46,8 +44,10 @@ def get_dashboard():
 def get_services():
     """Get all services."""
     try:
-        services = Service.query.all()
-        return jsonify([service.to_dict() for service in services])
+        return stream_json_array(
+            Service.query,
+            lambda services: [service.to_dict() for service in services]
+        )
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -74,7 +74,6 @@ def create_service():
 def update_service(id):
     service = Service.query.get_or_404(id)
     data = request.get_json()
-    print(data.get('is_active'))
     
     service.name = data.get('name', service.name)
     service.description = data.get('description', service.description)
@@ -82,7 +81,6 @@ def update_service(id):
     service.base_price = data.get('price', service.base_price)
     service.image_url = data.get('image_url', service.image_url)
     service.is_active = data.get('is_active').lower() == 'true'
-    print(service.is_active)
     
     db.session.commit()
     return jsonify({'message': 'Service updated successfully'}), 200
@@ -99,15 +97,28 @@ def delete_service(id):
 @admin_required
 def get_all_bookings():
     """Get all bookings."""
+    try:
+        columns = requested_columns(ServiceRequest, ServiceRequest.FIELDS)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
     try:
         status = request.args.get('status')
         query = ServiceRequest.query
         
         if status:
             query = query.filter_by(status=status)
-            
-        bookings = query.all()
-        return jsonify([booking.to_dict() for booking in bookings])
+
+        if pagination_requested():
+            page = paginate(query, ServiceRequest, columns)
+            return page_response(page, page.items if columns else ServiceRequest.to_dict_list(page.items))
+
+        if columns:
+            return stream_json_array(query.with_entities(*columns))
+
+        return stream_json_array(query, ServiceRequest.to_dict_list)
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -134,15 +145,28 @@ def update_booking_status(booking_id):
 @admin_required
 def get_users():
     """Get all users."""
+    try:
+        columns = requested_columns(User, User.FIELDS)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
     try:
         role = request.args.get('role')
         query = User.query
         
         if role:
             query = query.filter_by(role=role)
-            
-        users = query.all()
-        return jsonify([user.to_dict() for user in users])
+
+        if pagination_requested():
+            page = paginate(query, User, columns)
+            return page_response(page, page.items if columns else [user.to_dict() for user in page.items])
+
+        if columns:
+            return stream_json_array(query.with_entities(*columns))
+
+        return stream_json_array(query, lambda users: [user.to_dict() for user in users])
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -289,7 +313,11 @@ def search_professionals():
         query = request.args.get('q', '')
         service_type = request.args.get('service_type')
         
-        professionals = User.query.filter_by(role='professional')
+        if service_type:
+            # Index lookup on professional_services instead of a JSON scan
+            professionals = User.offering(service_type)
+        else:
+            professionals = User.query.filter_by(role='professional')
         
         if query:
             professionals = professionals.filter(
@@ -297,9 +325,6 @@ def search_professionals():
                 (User.email.ilike(f'%{query}%'))
             )
             
-        if service_type:
-            professionals = professionals.filter(User.services.contains([service_type]))
-            
         return jsonify([p.to_dict() for p in professionals.all()])
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -307,43 +332,63 @@ def search_professionals():
 @bp.route('/exports/service-requests', methods=['POST'])
 @admin_required
 def export_service_requests():
-    """Trigger CSV export generation for all service requests."""
+    """Start an export of service requests.
+
+    Optional JSON body: export_format ('csv' or 'ndjson'), start_date and
+    end_date (YYYY-MM-DD, inclusive, on created_at), or mode 'incremental'
+    with a consumer name to export only rows changed since its last export.
+    """
+    try:
+        params = export_params(request.get_json(silent=True) or {})
+    except ExportError as e:
+        return jsonify({'error': str(e)}), 400
+
     try:
-        # Start async task to generate the CSV
-        task = generate_service_requests_csv.delay()
+        # Identical requests share one job: a double click or a second admin gets the running export
+        fingerprint = export_fingerprint(params)
+        export_id, started = claim_export(fingerprint)
+        if started:
+            try:
+                # The export is finished by a chord callback that runs under this id
+                generate_service_requests_csv.delay(export_id=export_id, fingerprint=fingerprint, **params)
+            except Exception:
+                release_export_claim(fingerprint, export_id)
+                raise
 
         return jsonify({
-            'message': 'CSV generation started.',
-            'task_id': task.id  # Send the task ID to track progress or retrieve the file later
+            'message': 'Export generation started.' if started else 'An identical export is already running or just finished.',
+            'task_id': export_id,  # Send the task ID to track progress or retrieve the file later
+            'deduplicated': not started
         })
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@bp.route('/exports/consumers/<consumer>', methods=['GET'])
+@admin_required
+def get_export_watermark(consumer):
+    """Watermark and latest export of an incremental export consumer."""
+    state = db.session.get(ExportWatermark, consumer)
+    if state is None:
+        return jsonify({'error': 'Unknown export consumer'}), 404
+    return jsonify(state.to_dict())
+
 @bp.route('/exports/<task_id>', methods=['GET'])
 @admin_required
 def get_export(task_id):
-    """Retrieve the generated CSV export for service requests."""
+    """Download the generated export; supports Range requests so large downloads can resume."""
     try:
-        # Retrieve CSV data from the cache using task_id
-        cache_key = f"service_requests_csv_{task_id}"
-        csv_data = cache.get(cache_key)
-
-        if not csv_data:
+        path, export_format = find_export(task_id)
+        if path is None:
             return jsonify({'error': 'Export not found or expired'}), 404
 
-        # Convert the CSV string data into bytes
-        csv_bytes = csv_data.encode('utf-8')  # Encoding CSV data to bytes
-
-        # Create an in-memory binary stream
-        output = BytesIO(csv_bytes)
-        output.seek(0)  # Rewind to the beginning of the file
-        
         return send_file(
-            output,
-            mimetype='text/csv',
+            path,
+            mimetype='application/gzip',
             as_attachment=True,
-            download_name='service_requests.csv'
+            download_name=f'service_requests.{export_format}.gz',
+            conditional=True,
+            max_age=0
         )
 
     except Exception as e:
@@ -3,6 +3,8 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.api import bp
 from app.extensions import db
 from app.models import User, Service, ServiceRequest
+from app.decorators import current_user_or_404
+from app.utils.pagination import PaginationError, pagination_requested, paginate, page_response
 from datetime import datetime
 
 @bp.route('/services', methods=['GET'])
@@ -46,7 +48,7 @@ def get_professionals():
 @jwt_required()
 def create_service_request():
     current_user_id = get_jwt_identity()
-    user = User.query.get_or_404(current_user_id)
+    user = current_user_or_404()
     
     if user.role != 'customer':
         return jsonify({'error': 'Only customers can create service requests'}), 403
@@ -79,16 +81,26 @@ def create_service_request():
 @jwt_required()
 def get_service_requests():
     current_user_id = get_jwt_identity()
-    user = User.query.get_or_404(current_user_id)
+    user = current_user_or_404()
     
     if user.role == 'customer':
-        requests = ServiceRequest.query.filter_by(customer_id=current_user_id).all()
+        query = ServiceRequest.query.filter_by(customer_id=current_user_id)
     elif user.role == 'professional':
-        requests = ServiceRequest.query.filter_by(professional_id=current_user_id).all()
+        query = ServiceRequest.query.filter_by(professional_id=current_user_id)
     else:
         return jsonify({'error': 'Invalid user role'}), 400
+
+    page = None
+    if pagination_requested():
+        try:
+            page = paginate(query, ServiceRequest)
+        except PaginationError as e:
+            return jsonify({'error': str(e)}), 400
+        requests = page.items
+    else:
+        requests = query.all()
     
-    return jsonify([{
+    payload = [{
         'id': r.id,
         'service': {
             'id': r.service.id,
@@ -110,13 +122,17 @@ def get_service_requests():
         'remarks': r.remarks,
         'created_at': r.created_at.isoformat(),
         'completed_at': r.completed_at.isoformat() if r.completed_at else None
-    } for r in requests]), 200
+    } for r in requests]
+
+    if page:
+        return page_response(page, payload), 200
+    return jsonify(payload), 200
 
 @bp.route('/service-requests/<int:id>/accept', methods=['POST'])
 @jwt_required()
 def accept_service_request(id):
     current_user_id = get_jwt_identity()
-    user = User.query.get_or_404(current_user_id)
+    user = current_user_or_404()
     
     if user.role != 'professional':
         return jsonify({'error': 'Only professionals can accept service requests'}), 403
@@ -1,10 +1,13 @@
 from flask import Blueprint, request, jsonify, current_app, flash
-from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import create_access_token, jwt_required
 from app.models.user import User
 from app import db
 from datetime import timedelta, datetime
 from config import Config
 from app.auth import bp
+from app.auth.tokens import issue_tokens
+from app.decorators import current_user_claims, current_user_or_404, load_current_user
+from app.utils.passwords import PasswordVerifierBusy
 from functools import wraps
 from werkzeug.security import generate_password_hash, check_password_hash
 
@@ -13,14 +16,20 @@ def role_required(roles):
         @wraps(f)
         @jwt_required()
         def decorated_function(*args, **kwargs):
-            current_user_id = get_jwt_identity()
-            user = User.query.get(current_user_id)
-            if not user or user.role not in roles:
+            claims = current_user_claims()
+            if not claims or claims['role'] not in roles:
                 return jsonify({'error': 'Unauthorized'}), 403
+            if claims['is_active'] is False:
+                return jsonify({'error': 'Account is disabled'}), 403
             return f(*args, **kwargs)
         return decorated_function
     return decorator
 
+def busy_response(error):
+    response = jsonify({'error': str(error)})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
 @bp.route('/test', methods=['GET'])
 def test():
     """Test endpoint."""
@@ -57,10 +66,11 @@ def register():
     db.session.add(user)
     db.session.commit()
     
+    access_token, refresh_token = issue_tokens(user)
     return jsonify({
         'message': 'User registered successfully',
-        'access_token': create_access_token(identity=user.id),
-        'refresh_token': create_refresh_token(identity=user.id),
+        'access_token': access_token,
+        'refresh_token': refresh_token,
         'user': {
                 'id': user.id,
                 'name': user.name,
@@ -75,11 +85,21 @@ def login():
     data = request.get_json()
     user = User.query.filter_by(email=data['email']).first()
     
-    if user and user.verify_password(data['password']):
-        access_token = create_access_token(identity=user.id)
+    try:
+        verified = user is not None and user.verify_password(data['password'])
+    except PasswordVerifierBusy as e:
+        return busy_response(e)
+
+    if verified:
+        # Upgrade hashes made with outdated parameters while the plaintext is at hand
+        if user.password_needs_rehash():
+            user.password = data['password']
+            db.session.commit()
+
+        access_token, refresh_token = issue_tokens(user)
         return jsonify({
             'access_token': access_token,
-            'refresh_token': create_refresh_token(identity=user.id),
+            'refresh_token': refresh_token,
             'user': {
                 'id': user.id,
                 'name': user.name,
@@ -97,27 +117,27 @@ def admin_login():
     try:
         response = request.get_json()
         data = response['email']
-        print(data)
         
         if not data or 'email' not in data or 'password' not in data:
             return jsonify({'error': 'Email and password are required'}), 400
             
-        print("email", data['email'])
         user = User.query.filter_by(email=data['email'], role='admin').first()
-        print(user)
 
         if not user or not user.verify_password(data['password']):
             return jsonify({'error': 'Invalid admin credentials'}), 401
             
         if not user.is_active:
             return jsonify({'error': 'Admin account is disabled'}), 403
+
+        # Upgrade outdated hashes; committed together with the login info below
+        if user.password_needs_rehash():
+            user.password = data['password']
         
         # Update login info
         user.update_login_info(request.remote_addr)
         
         # Create tokens
-        access_token = create_access_token(identity=user.id)
-        refresh_token = create_refresh_token(identity=user.id)
+        access_token, refresh_token = issue_tokens(user)
         
         flash('Admin login successful!', 'success')
         return jsonify({
@@ -132,6 +152,8 @@ def admin_login():
             'refresh_token': refresh_token
         })
         
+    except PasswordVerifierBusy as e:
+        return busy_response(e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -139,16 +161,18 @@ def admin_login():
 @jwt_required(refresh=True)
 def refresh():
     """Refresh access token."""
-    current_user_id = get_jwt_identity()
-    access_token = create_access_token(identity=current_user_id)
+    user = load_current_user()
+    if not user or user.is_active is False:
+        return jsonify({'error': 'Unauthorized'}), 401
+    # Re-read the account so the new token carries its current state
+    access_token = create_access_token(identity=user.id, additional_claims=user.token_claims())
     return jsonify({'access_token': access_token}), 200
 
 @bp.route('/profile', methods=['GET'])
 @jwt_required()
 def get_profile():
     """Get user profile."""
-    current_user_id = get_jwt_identity()
-    user = User.query.get_or_404(current_user_id)
+    user = current_user_or_404()
     
     return jsonify({
         'id': user.id,
@@ -168,8 +192,7 @@ def get_profile():
 @jwt_required()
 def update_profile():
     """Update user profile."""
-    current_user_id = get_jwt_identity()
-    user = User.query.get_or_404(current_user_id)
+    user = current_user_or_404()
     data = request.get_json()
     
     # Update basic fields
@@ -189,8 +212,7 @@ def update_profile():
 @bp.route('/me', methods=['GET'])
 @jwt_required()
 def get_current_user():
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_user_or_404()
     return jsonify(user.to_dict()), 200 
 
 @bp.route('/logout')
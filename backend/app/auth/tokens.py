@@ -0,0 +1,59 @@
+from flask import current_app, has_app_context
+from flask_jwt_extended import create_access_token, create_refresh_token
+from sqlalchemy import event, inspect
+from app.extensions import cache, db, jwt
+from app.models.user import User
+
+def _version_key(user_id):
+    return f'auth:ver:{user_id}'
+
+def issue_tokens(user):
+    """Access and refresh tokens for user, carrying its role and account state."""
+    claims = user.token_claims()
+    return (
+        create_access_token(identity=user.id, additional_claims=claims),
+        create_refresh_token(identity=user.id, additional_claims=claims)
+    )
+
+def current_token_version(user_id):
+    """The token_version tokens of user_id must carry; None once the user is gone."""
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = db.session.query(User.token_version).filter(User.id == user_id).scalar()
+        # Deleted users are cached as -1 so their tokens keep failing without a query
+        version = -1 if version is None else version
+        cache.set(key, version, timeout=current_app.config.get('TOKEN_VERSION_CACHE_TIMEOUT'))
+    return None if version == -1 else version
+
+@jwt.token_in_blocklist_loader
+def _token_is_stale(jwt_header, jwt_payload):
+    # Tokens issued before claims were embedded carry no version; role_required
+    # checks those against the database instead
+    if 'ver' not in jwt_payload:
+        return False
+    return current_token_version(jwt_payload['sub']) != jwt_payload['ver']
+
+@event.listens_for(db.session, 'after_flush')
+def _collect_token_versions(session, flush_context):
+    versions = session.info.setdefault('token_versions', {})
+    for user in session.dirty:
+        if isinstance(user, User) and inspect(user).attrs.token_version.history.has_changes():
+            versions[user.id] = user.token_version
+    for user in session.deleted:
+        if isinstance(user, User):
+            versions[user.id] = -1
+
+@event.listens_for(db.session, 'after_commit')
+def _publish_token_versions(session):
+    versions = session.info.pop('token_versions', None)
+    if versions and has_app_context():
+        # Overwrite rather than delete so the next request needs no read-through query
+        cache.set_many(
+            {_version_key(user_id): version for user_id, version in versions.items()},
+            timeout=current_app.config.get('TOKEN_VERSION_CACHE_TIMEOUT')
+        )
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_token_versions(session):
+    session.info.pop('token_versions', None)
@@ -3,9 +3,16 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.models import User, Service, ServiceRequest, Review
 from app import db
 from app.auth.routes import role_required
+from app.decorators import current_user_or_404
 from datetime import datetime
 from app.customer import bp
+from app.utils.cache_tags import cached_response
+from app.utils.fields import requested_columns, project
+from app.utils.pagination import PaginationError, pagination_requested, paginate, page_response
 from sqlalchemy import func
+import logging
+
+logger = logging.getLogger(__name__)
 
 @bp.route('/test', methods=['GET'])
 @role_required(['customer'])
@@ -15,27 +22,27 @@ def test():
 
 @bp.route('/dashboard', methods=['GET'])
 @role_required(['customer'])
+@cached_response('user:{user_id}', 'requests:customer:{user_id}', 'services:all')
 def get_dashboard():
     """Get customer's dashboard data."""
     try:
         current_user_id = get_jwt_identity()
-        customer = User.query.get_or_404(current_user_id)
+        customer = current_user_or_404()
         
         # Get customer's service requests
         active_requests = ServiceRequest.query.filter_by(
             customer_id=customer.id
         ).filter(ServiceRequest.status.in_(['pending', 'accepted'])).all()
-        print(active_requests,"===================================")
         
         completed_requests = ServiceRequest.query.filter_by(
             customer_id=customer.id,
             status='completed'
         ).all()
-        print(completed_requests,"===================================")
         
         # Get recent services
         recent_services = Service.query.filter_by(is_active=True).limit(5).all()
-        print(recent_services,"===================================")
+        logger.debug('customer dashboard: %d active, %d completed requests',
+                     len(active_requests), len(completed_requests))
         
         return jsonify({
             'profile': customer.to_dict(),
@@ -43,8 +50,8 @@ def get_dashboard():
                 'active_requests': len(active_requests),
                 'completed_requests': len(completed_requests)
             },
-            'active_requests': [req.to_dict() for req in active_requests],
-            'completed_requests': [req.to_dict() for req in completed_requests],
+            'active_requests': ServiceRequest.to_dict_list(active_requests),
+            'completed_requests': ServiceRequest.to_dict_list(completed_requests),
             'recent_services': [service.to_dict() for service in recent_services]
         })
     except Exception as e:
@@ -56,7 +63,7 @@ def request_service():
     """Request a new service."""
     try:
         current_user_id = get_jwt_identity()
-        customer = User.query.get_or_404(current_user_id)
+        customer = current_user_or_404()
         data = request.get_json()
         
         # Validate required fields
@@ -97,7 +104,7 @@ def update_request_service(id):
     """Update service."""
     try:
         current_user_id = get_jwt_identity()
-        customer = User.query.get_or_404(current_user_id)
+        customer = current_user_or_404()
         data = request.get_json()
         
         # Validate required fields
@@ -129,6 +136,11 @@ def update_request_service(id):
 @role_required(['customer'])
 def get_requests():
     """Get customer's service requests."""
+    try:
+        columns = requested_columns(ServiceRequest, ServiceRequest.FIELDS)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
     try:
         current_user_id = get_jwt_identity()
         status = request.args.get('status')
@@ -136,9 +148,19 @@ def get_requests():
         query = ServiceRequest.query.filter_by(customer_id=current_user_id)
         if status:
             query = query.filter_by(status=status)
+        query = query.order_by(ServiceRequest.created_at.desc())
+
+        if pagination_requested():
+            page = paginate(query, ServiceRequest, columns, descending=True)
+            return page_response(page, page.items if columns else ServiceRequest.to_dict_list(page.items))
+
+        if columns:
+            return jsonify(project(query, columns))
             
-        requests = query.order_by(ServiceRequest.created_at.desc()).all()
-        return jsonify([req.to_dict() for req in requests])
+        requests = query.all()
+        return jsonify(ServiceRequest.to_dict_list(requests))
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -215,7 +237,7 @@ def get_profile():
     """Get customer's profile."""
     try:
         current_user_id = get_jwt_identity()
-        customer = User.query.get_or_404(current_user_id)
+        customer = current_user_or_404()
         return jsonify(customer.to_dict())
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -226,7 +248,7 @@ def update_profile():
     """Update customer's profile."""
     try:
         current_user_id = get_jwt_identity()
-        customer = User.query.get_or_404(current_user_id)
+        customer = current_user_or_404()
         data = request.get_json()
         
         # Update allowed fields
@@ -250,20 +272,12 @@ def get_professionals(serviceID):
         service = Service.query.get(serviceID)
         if not service:
             return jsonify({'error': 'Service not found'}), 404
-        print(service.name, '=================')
 
-        # Get all professionals
-        professionals = User.query.filter(
-            User.role == 'professional',
+        # Look up approved professionals offering this service through the index
+        filtered_professionals = User.offering(service.name).filter(
             User.is_approved == 1
-        ).all()
-
-        # Filter professionals in Python
-        filtered_professionals = [
-            prof for prof in professionals if service.name in prof.services
-        ]
-
-        print(filtered_professionals, '=============================')
+        ).order_by(User.id).all()
+        logger.debug('%d professionals offer %s', len(filtered_professionals), service.name)
         
         if not filtered_professionals:
             return jsonify({'message': 'No professionals found for this service'}), 404
@@ -282,7 +296,7 @@ def get_customer_stats():
     try:
         # Get current customer by JWT identity
         current_user_id = get_jwt_identity()
-        customer = User.query.get_or_404(current_user_id)
+        customer = current_user_or_404()
 
         # Total requests (all statuses)
         total_requests = ServiceRequest.query.filter_by(customer_id=customer.id).count()
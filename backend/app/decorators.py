@@ -1,15 +1,40 @@
 from functools import wraps
-from flask import jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import abort, g, jsonify
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
+from app.extensions import db
 from app.models.user import User
 
+def load_current_user():
+    """The authenticated User, loaded at most once per request."""
+    if 'current_user' not in g:
+        g.current_user = db.session.get(User, get_jwt_identity())
+    return g.current_user
+
+def current_user_or_404():
+    user = load_current_user()
+    if user is None:
+        abort(404)
+    return user
+
+def current_user_claims():
+    """Role and account state of the authenticated user, or None if it no longer exists.
+
+    Read from the token when it carries them, so authorization costs no query.
+    """
+    claims = get_jwt()
+    if 'role' in claims:
+        return claims
+    user = load_current_user()
+    return user.token_claims() if user else None
+
 def admin_required(f):
     @wraps(f)
     @jwt_required()
     def decorated_function(*args, **kwargs):
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        if not user or user.role != 'admin':
+        claims = current_user_claims()
+        if not claims or claims['role'] != 'admin':
             return jsonify({'error': 'Admin access required'}), 403
+        if claims['is_active'] is False:
+            return jsonify({'error': 'Account is disabled'}), 403
         return f(*args, **kwargs)
-    return decorated_function 
\ No newline at end of file
+    return decorated_function
@@ -2,10 +2,10 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
 from flask_mail import Mail
-from flask_caching import Cache
+from app.utils.metrics import MeteredCache
 
 db = SQLAlchemy()
 migrate = Migrate()
 jwt = JWTManager()
 mail = Mail()
-cache = Cache()
\ No newline at end of file
+cache = MeteredCache()
\ No newline at end of file
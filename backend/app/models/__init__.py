@@ -1,14 +1,18 @@
 from app.models.user import User
 from app.models.service import Service, ServiceRequest
 from app.models.review import Review
+from app.models.counter import Counter
+from app.models.export import ExportWatermark
 
 # Define table creation order
 __all__ = [
     'User',
     'Service',
     'ServiceRequest',
-    'Review'
+    'Review',
+    'Counter',
+    'ExportWatermark'
 ]
 
 # Import models to ensure they are registered with SQLAlchemy
-from . import user, service 
\ No newline at end of file
+from . import user, service, counter, export 
\ No newline at end of file
@@ -0,0 +1,147 @@
+from collections import Counter as Tally
+from datetime import datetime
+from sqlalchemy import event, func, inspect
+from sqlalchemy.dialects import postgresql, sqlite
+from app.extensions import db
+from app.models.user import User
+from app.models.service import Service, ServiceRequest
+
+class Counter(db.Model):
+    """Row counts kept up to date by write hooks so the admin dashboard never runs COUNT(*)."""
+
+    __tablename__ = 'counters'
+
+    name = db.Column(db.String(64), primary_key=True)
+    value = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<Counter {self.name}={self.value}>'
+
+    @staticmethod
+    def values():
+        """Return all counters as a dict in one query.
+
+        Before the counters are seeded (by the migration or reconcile_counters)
+        the values are counted from the source tables; nothing is written, so
+        this is safe to call from a read-only request.
+        """
+        values = dict(db.session.query(Counter.name, Counter.value).all())
+        if not values:
+            values = count_rows()
+        return values
+
+def _user_keys(role):
+    return ['users', f'users:role:{role}']
+
+def _request_keys(status):
+    return ['service_requests', f'service_requests:status:{status}']
+
+def _previous(obj, attr):
+    """Value of attr before this flush, falling back to the current value."""
+    history = inspect(obj).attrs[attr].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(obj, attr)
+
+@event.listens_for(db.session, 'before_flush')
+def _count_deletes(session, flush_context, instances):
+    # The rows still exist here, so an expired instance can load the role/status it is deleted with
+    deltas = Tally()
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            deltas.subtract(_user_keys(_previous(obj, 'role')))
+        elif isinstance(obj, ServiceRequest):
+            deltas.subtract(_request_keys(_previous(obj, 'status')))
+        elif isinstance(obj, Service):
+            deltas.subtract(['services'])
+    # Replaced on every flush, so a flush that failed leaves nothing behind
+    session.info['counter_deltas'] = deltas
+
+@event.listens_for(db.session, 'after_flush')
+def _track_counters(session, flush_context):
+    deltas = session.info.pop('counter_deltas', None) or Tally()
+
+    # New rows are counted after the flush, once column defaults are filled in
+    for obj in session.new:
+        if isinstance(obj, User):
+            deltas.update(_user_keys(obj.role))
+        elif isinstance(obj, ServiceRequest):
+            deltas.update(_request_keys(obj.status))
+        elif isinstance(obj, Service):
+            deltas.update(['services'])
+
+    # role and status have active_history, so the old value is known even for expired instances
+    for obj in session.dirty:
+        if isinstance(obj, User):
+            history = inspect(obj).attrs.role.history
+            if history.deleted and history.added:
+                deltas.subtract([f'users:role:{history.deleted[0]}'])
+                deltas.update([f'users:role:{history.added[0]}'])
+        elif isinstance(obj, ServiceRequest):
+            history = inspect(obj).attrs.status.history
+            if history.deleted and history.added:
+                deltas.subtract([f'service_requests:status:{history.deleted[0]}'])
+                deltas.update([f'service_requests:status:{history.added[0]}'])
+
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if deltas:
+        _apply_deltas(session.connection(), deltas)
+
+def _apply_deltas(connection, deltas):
+    _upsert(connection, deltas, increment=True)
+
+def _upsert(connection, values, increment):
+    """Add values to the counters (increment) or overwrite them, creating missing rows."""
+    table = Counter.__table__
+    now = datetime.utcnow()
+    dialect = {'postgresql': postgresql, 'sqlite': sqlite}.get(connection.dialect.name)
+
+    for name, value in sorted(values.items()):
+        if dialect:
+            stmt = dialect.insert(table).values(name=name, value=value, updated_at=now)
+            new_value = table.c.value + stmt.excluded.value if increment else stmt.excluded.value
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c.name],
+                set_={'value': new_value, 'updated_at': now}
+            )
+            connection.execute(stmt)
+            continue
+
+        result = connection.execute(
+            table.update().where(table.c.name == name).values(
+                value=table.c.value + value if increment else value, updated_at=now
+            )
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(name=name, value=value, updated_at=now))
+
+def count_rows():
+    """Every counter computed from the source tables."""
+    values = {
+        'users': User.query.count(),
+        'services': Service.query.count(),
+        'service_requests': ServiceRequest.query.count(),
+    }
+    for role, count in db.session.query(User.role, func.count(User.id)).group_by(User.role):
+        values[f'users:role:{role}'] = count
+    for status, count in db.session.query(ServiceRequest.status, func.count(ServiceRequest.id)).group_by(ServiceRequest.status):
+        values[f'service_requests:status:{status}'] = count
+    return values
+
+def reconcile_counters():
+    """Recompute every counter from the source tables and commit; returns the new values.
+
+    Rows are upserted in place rather than deleted and reinserted, so a write
+    hook running concurrently never finds its counter missing. Counters for a
+    role or status that no longer has rows drop to zero.
+    """
+    values = count_rows()
+    table = Counter.__table__
+    connection = db.session.connection()
+    _upsert(connection, values, increment=False)
+    connection.execute(
+        table.update().where(table.c.name.not_in(values)).values(value=0, updated_at=datetime.utcnow())
+    )
+    db.session.commit()
+    return values
@@ -0,0 +1,29 @@
+from datetime import datetime
+from app.extensions import db
+
+class ExportWatermark(db.Model):
+    """How far each consumer of incremental exports has been exported.
+
+    watermark is the updated_at bound of the last finished export; the next
+    incremental export picks up rows changed after it.
+    """
+
+    __tablename__ = 'export_watermarks'
+
+    consumer = db.Column(db.String(100), primary_key=True)
+    watermark = db.Column(db.DateTime)
+    last_full_at = db.Column(db.DateTime)
+    last_export_id = db.Column(db.String(64))
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<ExportWatermark {self.consumer}={self.watermark}>'
+
+    def to_dict(self):
+        return {
+            'consumer': self.consumer,
+            'watermark': self.watermark,
+            'last_full_at': self.last_full_at,
+            'last_export_id': self.last_export_id,
+            'updated_at': self.updated_at
+        }
@@ -13,6 +13,12 @@ class Review(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_reviews_professional_id', 'professional_id'),
+        db.Index('ix_reviews_service_request_id', 'service_request_id'),
+        db.Index('ix_reviews_user_id', 'user_id'),
+    )
+
     def __repr__(self):
         return f'<Review {self.id} by User {self.user_id} for Professional {self.professional_id}>'
 
@@ -1,9 +1,18 @@
 from datetime import datetime
 from app.extensions import db
+from app.models.review import Review
+from app.models.user import User
+from app.utils.batching import load_by_id, load_in_batches
 
 class Service(db.Model):
     __tablename__ = 'services'
 
+    # Columns that may be selected through ?fields=
+    FIELDS = (
+        'id', 'name', 'category', 'description', 'base_price', 'image_url',
+        'is_active', 'created_at', 'updated_at'
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     category = db.Column(db.String(50), nullable=False)
@@ -36,11 +45,19 @@ class Service(db.Model):
 class ServiceRequest(db.Model):
     __tablename__ = 'service_requests'
 
+    # Columns that may be selected through ?fields=
+    FIELDS = (
+        'id', 'customer_id', 'service_id', 'professional_id', 'status', 'address',
+        'preferred_date', 'notes', 'final_price', 'created_at', 'updated_at',
+        'completed_at'
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     customer_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     service_id = db.Column(db.Integer, db.ForeignKey('services.id'), nullable=False)
     professional_id = db.Column(db.Integer, db.ForeignKey('users.id'))
-    status = db.Column(db.String(20), default='pending')  # pending, accepted, completed, cancelled
+    # active_history loads the old status even on an expired instance, for the counter hooks
+    status = db.column_property(db.Column(db.String(20), default='pending'), active_history=True)  # pending, accepted, completed, cancelled
     address = db.Column(db.String(255), nullable=False)
     preferred_date = db.Column(db.DateTime, nullable=False)
     notes = db.Column(db.Text)
@@ -52,11 +69,29 @@ class ServiceRequest(db.Model):
     # Relationships
     reviews = db.relationship('Review', backref='service_request', lazy='dynamic')
 
+    # Dashboards filter by (customer_id|professional_id, status) and lists order by created_at
+    __table_args__ = (
+        db.Index('ix_service_requests_customer_status_created', 'customer_id', 'status', 'created_at'),
+        db.Index('ix_service_requests_professional_status_created', 'professional_id', 'status', 'created_at'),
+        db.Index('ix_service_requests_status_created', 'status', 'created_at'),
+        db.Index('ix_service_requests_created_id', 'created_at', 'id'),
+        db.Index('ix_service_requests_service_id', 'service_id'),
+        # Incremental exports scan rows changed since a watermark
+        db.Index('ix_service_requests_updated_id', 'updated_at', 'id'),
+    )
+
     def __repr__(self):
         return f'<ServiceRequest {self.id}>'
 
     def to_dict(self):
-        reviews = [review.to_dict() for review in self.reviews]
+        return self._serialize(
+            self.service,
+            self.customer,
+            self.professional,
+            list(self.reviews)
+        )
+
+    def _serialize(self, service, customer, professional, reviews):
         return {
             'id': self.id,
             'customer_id': self.customer_id,
@@ -70,12 +105,42 @@ class ServiceRequest(db.Model):
             'created_at': self.created_at,
             'updated_at': self.updated_at,
             'completed_at': self.completed_at,
-            'service': self.service.to_dict() if self.service else None,
-            'customer': self.customer.to_dict() if self.customer else None,
-            'reviews': reviews,
-            'professional': self.professional.to_dict() if self.professional else None
+            'service': service.to_dict() if service else None,
+            'customer': customer.to_dict() if customer else None,
+            'reviews': [review.to_dict() for review in reviews],
+            'professional': professional.to_dict() if professional else None
         }
 
+    @classmethod
+    def to_dict_list(cls, service_requests):
+        """Serialize many requests, loading related rows in batches instead of per row."""
+        service_requests = list(service_requests)
+        if not service_requests:
+            return []
+
+        service_ids = {r.service_id for r in service_requests if r.service_id is not None}
+        user_ids = {r.customer_id for r in service_requests if r.customer_id is not None}
+        user_ids.update(r.professional_id for r in service_requests if r.professional_id is not None)
+        request_ids = [r.id for r in service_requests]
+
+        services = load_by_id(Service, service_ids)
+        users = load_by_id(User, user_ids)
+
+        reviews = {}
+        review_query = Review.query.order_by(Review.id)
+        for review in load_in_batches(review_query, Review.service_request_id, request_ids):
+            reviews.setdefault(review.service_request_id, []).append(review)
+
+        return [
+            r._serialize(
+                services.get(r.service_id),
+                users.get(r.customer_id),
+                users.get(r.professional_id),
+                reviews.get(r.id, [])
+            )
+            for r in service_requests
+        ]
+
     def complete(self, final_price=None):
         self.status = 'completed'
         self.completed_at = datetime.utcnow()
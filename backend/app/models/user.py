@@ -1,23 +1,46 @@
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import event, func, inspect
 from app.extensions import db
+from app.utils import passwords
 from app.models.review import Review
 
+# Normalized copy of User.services so "who offers this service" is an index lookup
+professional_services = db.Table(
+    'professional_services',
+    db.Column('user_id', db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('service_name', db.String(100), primary_key=True),
+    db.Index('ix_professional_services_service_name', 'service_name', 'user_id')
+)
+
+# Account state copied into JWTs at issue time (see User.token_claims)
+TOKEN_CLAIMS = ('role', 'is_active', 'is_approved')
+
 class User(db.Model):
     __tablename__ = 'users'
 
+    # Columns that may be selected through ?fields= (never the password hash)
+    FIELDS = (
+        'id', 'name', 'email', 'phone', 'role', 'is_active', 'is_approved',
+        'created_at', 'updated_at', 'last_login', 'login_count',
+        'services', 'experience', 'about', 'average_rating', 'total_jobs'
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(255), nullable=False)
     phone = db.Column(db.String(20))
-    role = db.Column(db.String(20), default='customer')  # admin, customer, professional
+    # active_history loads the old role even on an expired instance, so the counter
+    # and token hooks always see what it changed from
+    role = db.column_property(db.Column(db.String(20), default='customer'), active_history=True)  # admin, customer, professional
     is_active = db.Column(db.Boolean, default=True)
     is_approved = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     last_login = db.Column(db.DateTime)
     login_count = db.Column(db.Integer, default=0)
+    # Bumped whenever a claim embedded in issued tokens changes, revoking those tokens
+    token_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
     # Professional specific fields
     services = db.Column(db.JSON)  # List of service categories
@@ -46,6 +69,12 @@ class User(db.Model):
                                      backref=db.backref('reviewed_professional', lazy=True),
                                      lazy='dynamic')
 
+    # Professional listings filter on role/approval/active state; admin lists page by created_at
+    __table_args__ = (
+        db.Index('ix_users_role_approved_active', 'role', 'is_approved', 'is_active'),
+        db.Index('ix_users_created_id', 'created_at', 'id'),
+    )
+
     def __repr__(self):
         return f'<User {self.email}>'
 
@@ -62,10 +91,14 @@ class User(db.Model):
 
     @password.setter
     def password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = passwords.hash_password(password)
 
     def verify_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        """May raise PasswordVerifierBusy when verification runs on the bounded pool."""
+        return passwords.verify_password(self.password_hash, password)
+
+    def password_needs_rehash(self):
+        return passwords.needs_rehash(self.password_hash)
 
     def update_login_info(self, ip_address=None):
         self.last_login = datetime.utcnow()
@@ -73,13 +106,11 @@ class User(db.Model):
         db.session.commit()
 
     def update_rating(self):
-        reviews = self.reviews_received.all()
-        if reviews:
-            self.average_rating = sum(r.rating for r in reviews) / len(reviews)
-            db.session.commit()
-        else:
-            self.average_rating = 0.0
-            db.session.commit()
+        """Recompute the stored rating aggregate; call on review writes, caller commits."""
+        average = db.session.query(func.avg(Review.rating)).filter(
+            Review.professional_id == self.id
+        ).scalar()
+        self.average_rating = float(average) if average is not None else 0.0
 
     def to_dict(self):
         data = {
@@ -96,8 +127,8 @@ class User(db.Model):
             'login_count': self.login_count
         }
 
+        # Professional aggregates are maintained on review writes, so this stays a pure read
         if self.role == 'professional':
-            self.update_rating()
             data.update({
                 'services': self.services,
                 'experience': self.experience,
@@ -108,6 +139,12 @@ class User(db.Model):
 
         return data
 
+    def token_claims(self):
+        """Account state embedded in this user's JWTs so authorization needs no lookup."""
+        claims = {attr: getattr(self, attr) for attr in TOKEN_CLAIMS}
+        claims['ver'] = self.token_version or 0
+        return claims
+
     def is_admin(self):
         return self.role == 'admin'
 
@@ -134,4 +171,62 @@ class User(db.Model):
             db.session.commit()
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password) 
\ No newline at end of file
+        self.password = password
+
+    def offered_service_names(self):
+        """Service names from the services JSON field, as stored in professional_services."""
+        if self.role != 'professional' or not self.services:
+            return []
+        services = self.services
+        if isinstance(services, str):
+            services = [services]
+        return list(dict.fromkeys(name for name in services if isinstance(name, str)))
+
+    @classmethod
+    def offering(cls, service_name):
+        """Query professionals whose services include service_name."""
+        return cls.query.join(
+            professional_services, professional_services.c.user_id == cls.id
+        ).filter(
+            cls.role == 'professional',
+            professional_services.c.service_name == service_name
+        )
+
+@event.listens_for(db.session, 'before_flush')
+def _bump_token_version(session, flush_context, instances):
+    """Revoke issued tokens when a claim they carry changes."""
+    for user in session.dirty:
+        if isinstance(user, User) and any(_changed(user, attr) for attr in TOKEN_CLAIMS):
+            user.token_version = (user.token_version or 0) + 1
+
+def _changed(obj, attr):
+    history = inspect(obj).attrs[attr].history
+    return bool(history.added) and history.added[0] != (history.deleted[0] if history.deleted else None)
+
+@event.listens_for(db.session, 'after_flush')
+def _sync_professional_services(session, flush_context):
+    """Keep professional_services in step with User.services on every write."""
+    stale_ids = [user.id for user in session.deleted if isinstance(user, User)]
+    changed = [
+        user for user in list(session.new) + list(session.dirty)
+        if isinstance(user, User) and (
+            user in session.new
+            or inspect(user).attrs.services.history.has_changes()
+            or inspect(user).attrs.role.history.has_changes()
+        )
+    ]
+    stale_ids.extend(user.id for user in changed)
+    if not stale_ids:
+        return
+
+    connection = session.connection()
+    connection.execute(
+        professional_services.delete().where(professional_services.c.user_id.in_(stale_ids))
+    )
+    rows = [
+        {'user_id': user.id, 'service_name': name}
+        for user in changed
+        for name in user.offered_service_names()
+    ]
+    if rows:
+        connection.execute(professional_services.insert(), rows)
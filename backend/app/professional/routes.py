@@ -3,17 +3,20 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.models import User, ServiceRequest, Service
 from app import db
 from app.auth.routes import role_required
+from app.decorators import current_user_or_404
 from datetime import datetime
 from app.professional import bp
+from app.utils.cache_tags import cached_response
+from app.utils.pagination import PaginationError, pagination_requested, paginate, page_response
 
 @bp.route('/dashboard', methods=['GET'])
 @role_required(['professional'])
+@cached_response('user:{user_id}', 'requests:professional:{user_id}', 'services:all')
 def get_dashboard():
     """Get professional's dashboard data."""
     try:
         current_user_id = get_jwt_identity()
-        professional = User.query.get_or_404(current_user_id)
-        print("Found professional", professional)
+        professional = current_user_or_404()
         
         # Get pending requests for this professional's services
         pending_requests = ServiceRequest.query.filter_by(
@@ -41,9 +44,9 @@ def get_dashboard():
                 'pending_requests': len(pending_requests),
                 'active_requests': len(accepted_requests)
             },
-            'pending_requests': [req.to_dict() for req in pending_requests],
-            'active_requests': [req.to_dict() for req in accepted_requests],
-            'completed_services': [req.to_dict() for req in completed_services]
+            'pending_requests': ServiceRequest.to_dict_list(pending_requests),
+            'active_requests': ServiceRequest.to_dict_list(accepted_requests),
+            'completed_services': ServiceRequest.to_dict_list(completed_services)
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -54,23 +57,29 @@ def get_requests():
     """Get service requests for the professional."""
     try:
         current_user_id = get_jwt_identity()
-        professional = User.query.get_or_404(current_user_id)
+        professional = current_user_or_404()
         
         status = request.args.get('status', 'pending')
         if status == 'pending':
             # Get requests matching professional's services
-            requests = ServiceRequest.query.filter_by(
+            query = ServiceRequest.query.filter_by(
                 professional_id=professional.id,
                 status='pending'
-            ).all()
+            )
         else:
             # Get requests assigned to this professional
-            requests = ServiceRequest.query.filter_by(
+            query = ServiceRequest.query.filter_by(
                 professional_id=professional.id,
                 status=status
-            ).all()
+            )
+
+        if pagination_requested():
+            page = paginate(query, ServiceRequest)
+            return page_response(page, ServiceRequest.to_dict_list(page.items))
             
-        return jsonify([req.to_dict() for req in requests])
+        return jsonify(ServiceRequest.to_dict_list(query.all()))
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -80,7 +89,7 @@ def accept_request(request_id):
     """Accept a service request."""
     try:
         current_user_id = get_jwt_identity()
-        professional = User.query.get_or_404(current_user_id)
+        professional = current_user_or_404()
         service_request = ServiceRequest.query.get_or_404(request_id)
         
         # Validate request can be accepted
@@ -110,7 +119,7 @@ def reject_request(request_id):
     """Reject a service request."""
     try:
         current_user_id = get_jwt_identity()
-        professional = User.query.get_or_404(current_user_id)
+        professional = current_user_or_404()
         service_request = ServiceRequest.query.get_or_404(request_id)
         
         # Validate request can be rejected
@@ -137,7 +146,7 @@ def complete_request(request_id):
     """Mark a service request as completed."""
     try:
         current_user_id = get_jwt_identity()
-        professional = User.query.get_or_404(current_user_id)
+        professional = current_user_or_404()
         service_request = ServiceRequest.query.get_or_404(request_id)
         
         # Validate request can be completed
@@ -167,7 +176,7 @@ def get_profile():
     """Get professional's profile."""
     try:
         current_user_id = get_jwt_identity()
-        professional = User.query.get_or_404(current_user_id)
+        professional = current_user_or_404()
         return jsonify(professional.to_dict())
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -178,7 +187,7 @@ def update_profile():
     """Update professional's profile."""
     try:
         current_user_id = get_jwt_identity()
-        professional = User.query.get_or_404(current_user_id)
+        professional = current_user_or_404()
         data = request.get_json()
         
         # Update allowed fields
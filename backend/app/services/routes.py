@@ -6,6 +6,8 @@ from sqlalchemy import or_
 from datetime import datetime
 import logging
 from app.services import bp
+from app.decorators import load_current_user
+from app.utils.fields import requested_columns, project
 from sqlalchemy import func
 
 logger = logging.getLogger(__name__)
@@ -13,13 +15,26 @@ logger = logging.getLogger(__name__)
 @bp.route('/', methods=['GET', 'OPTIONS'])
 def get_services():
     """Get all active services with average rating."""
+    try:
+        columns = requested_columns(Service, Service.FIELDS, extra={
+            'average_rating': func.coalesce(func.avg(Review.rating), 0)
+        })
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
     # Query services along with the average rating
     services = db.session.query(
         Service,
         func.avg(Review.rating).label('average_rating')  # Calculate the average rating
     ).outerjoin(Review, Service.id == Review.service_request_id)  # Left join with the Review table
     services = services.filter(Service.is_active == True)  # Filter for active services
-    services = services.group_by(Service.id).all()  # Group by Service id to calculate the average
+    services = services.group_by(Service.id)  # Group by Service id to calculate the average
+
+    # Sparse fieldsets skip the ORM objects entirely
+    if columns:
+        return jsonify(project(services, columns))
+
+    services = services.all()
     
     # Prepare the response with services and average rating
     result = []
@@ -128,7 +143,7 @@ def get_user_bookings():
     try:
         current_user_id = get_jwt_identity()
         bookings = ServiceRequest.query.filter_by(user_id=current_user_id).all()
-        return jsonify([booking.to_dict() for booking in bookings])
+        return jsonify(ServiceRequest.to_dict_list(bookings))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -154,7 +169,7 @@ def create_service_request():
     """Create a new service request."""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = load_current_user()
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -195,7 +210,7 @@ def update_service_request(request_id):
     """Update a service request."""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = load_current_user()
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -229,7 +244,7 @@ def get_service_request(request_id):
     """Get a specific service request."""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = load_current_user()
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
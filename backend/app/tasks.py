@@ -1,25 +1,54 @@
 from app import db
 from app.models.user import User
-from app.models.service import ServiceRequest
+from app.models.service import Service, ServiceRequest
+from app.models.counter import reconcile_counters
 from datetime import datetime, timedelta
-import csv
-from io import StringIO
 import requests
-from flask import current_app, render_template
+from flask import current_app
 from flask_mail import Mail, Message
 from app.extensions import cache
-from app.utils.email import send_email
-from sqlalchemy import and_
+from app.utils.batching import load_by_id
+from app.utils.email import build_message, send_email, send_messages
+from app.utils.exports import (
+    advance_watermark, complete_export_claim, concatenate_parts, export_filters, export_path, export_query,
+    plan_incremental, plan_partitions, release_export_claim, remove_expired_exports, write_export
+)
+from sqlalchemy import case, func, select
 import os
-from celery import Celery
+import uuid
+from celery import Celery, chord
 
 mail = Mail()
 
 import app
 from celery import Task
+from celery.signals import worker_process_init
+from flask import has_app_context
+
+_worker_app = None
+
+def get_worker_app():
+    """The Flask app of this worker process, created once on first use."""
+    global _worker_app
+    if _worker_app is None:
+        _worker_app = app.create_app()
+    return _worker_app
+
+@worker_process_init.connect
+def init_worker_app(**kwargs):
+    """Build the app when a prefork child starts, not on its first task."""
+    flask_app = get_worker_app()
+    # An app inherited from the parent shares its pooled connections; start the child with its own
+    with flask_app.app_context():
+        db.engine.dispose(close=False)
+
 class taskContext(Task):
     def __call__(self, *args, **kwargs):
-        with app.create_app().app_context():
+        # Run inline (eager mode, .apply() from a view) inside the caller's context
+        if has_app_context():
+            return self.run(*args, **kwargs)
+        # Flask-SQLAlchemy removes the task's session when this context is popped
+        with get_worker_app().app_context():
             return self.run(*args, **kwargs)
 
 celery = Celery(
@@ -44,12 +73,26 @@ celery.conf.beat_schedule = {
     'trigger-monthly-mail':{
         'task': 'app.tasks.send_monthly_reports',
         'schedule': crontab(day_of_month=29, hour=21, minute=37)
+    },
+    'reconcile-dashboard-counters':{
+        'task': 'app.tasks.reconcile_dashboard_counters',
+        'schedule': crontab(minute=15)
+    },
+    'cleanup-exports':{
+        'task': 'app.tasks.cleanup_exports',
+        'schedule': crontab(minute=45)
+    },
+    # Rows changed since the BI job's last export, with a full snapshot every EXPORT_FULL_SNAPSHOT_DAYS
+    'nightly-incremental-export':{
+        'task': 'app.tasks.generate_service_requests_csv',
+        'schedule': crontab(hour=1, minute=0),
+        'kwargs': {'mode': 'incremental', 'consumer': 'bi'}
     }
 }
 
 @celery.task(base = taskContext)
 def helloWorld():
-    print('this is the first test task')
+    current_app.logger.info('this is the first test task')
     return 'hello world'
 
 @celery.task(base = taskContext)
@@ -62,138 +105,301 @@ def test_email():
     )
     return "Email sent successfully"
 
+@celery.task(base = taskContext)
+def reconcile_dashboard_counters():
+    """Correct any drift in the dashboard counters from writes that bypassed the ORM"""
+    values = reconcile_counters()
+    current_app.logger.info(f"Reconciled {len(values)} dashboard counters")
+    return values
+
 @celery.task(base = taskContext)
 def send_daily_reminders():
-    """Send daily reminders to professionals with pending service requests"""
-    try:
-        # Get all professionals with pending requests
-        professionals = User.query.filter_by(role='professional').all()
-
-        for professional in professionals:
-            # Get pending requests for this professional
-            pending_requests = ServiceRequest.query.filter(
-                and_(
-                    ServiceRequest.professional_id == professional.id,
-                    ServiceRequest.status == 'pending'
-                )
-            ).all()
+    """Send daily reminders to professionals with pending service requests, fanned out in chunks"""
+    # One grouped query finds everyone who needs a reminder
+    professional_ids = db.session.scalars(
+        select(ServiceRequest.professional_id)
+        .join(User, User.id == ServiceRequest.professional_id)
+        .where(ServiceRequest.status == 'pending', User.role == 'professional')
+        .group_by(ServiceRequest.professional_id)
+        .order_by(ServiceRequest.professional_id)
+    ).all()
+
+    size = current_app.config.get('REMINDER_CHUNK_SIZE', 500)
+    chunks = [professional_ids[i:i + size] for i in range(0, len(professional_ids), size)]
+    if not chunks:
+        current_app.logger.info("No pending requests, no daily reminders to send")
+        return {'professionals': 0, 'chunks': 0}
+
+    chord(send_reminder_chunk.s(chunk) for chunk in chunks)(summarize_reminders.s())
+    current_app.logger.info(f"Queued daily reminders for {len(professional_ids)} professionals in {len(chunks)} chunks")
+    return {'professionals': len(professional_ids), 'chunks': len(chunks)}
 
-            if pending_requests:
-                # Prepare email content
-                email_content = render_template(
-                    'email/daily_reminder.html',
+@celery.task(base = taskContext)
+def send_reminder_chunk(professional_ids):
+    """Render and send the daily reminders for one chunk of professionals and return its counts"""
+    professionals = User.query.filter(User.id.in_(professional_ids)).order_by(User.id).all()
+    pending = ServiceRequest.query.filter(
+        ServiceRequest.professional_id.in_(professional_ids),
+        ServiceRequest.status == 'pending'
+    ).order_by(ServiceRequest.created_at).all()
+
+    # Load what the template shows up front and hold on to it; request.service and
+    # request.customer are then answered from the identity map instead of a query per request
+    services = load_by_id(Service, {r.service_id for r in pending})
+    customers = load_by_id(User, {r.customer_id for r in pending})
+    by_professional = {}
+    for r in pending:
+        by_professional.setdefault(r.professional_id, []).append(r)
+
+    template = email_template('email/daily_reminder.html')
+    now = datetime.utcnow()
+    messages = []
+    failed = 0
+    for professional in professionals:
+        pending_requests = by_professional.get(professional.id)
+        if not pending_requests:
+            continue  # accepted or cancelled since the chunk was queued
+        try:
+            messages.append(build_message(
+                subject="You have pending service requests",
+                recipients=[professional.email],
+                html_body=template.render(
                     professional=professional,
                     pending_requests=pending_requests,
-                    now=datetime.utcnow()
+                    now=now
                 )
+            ))
+        except Exception:
+            failed += 1
+            current_app.logger.exception(f"Could not render daily reminder for professional {professional.id}")
 
-                # Send reminder email
-                send_email(
-                    subject="You have pending service requests",
-                    recipients=[professional.email],
-                    html_body=email_content
-                )
-                current_app.logger.info(f"Daily reminder sent to {professional.email}")
+    sent = send_messages(messages)
+    failed += len(messages) - sent
+    counts = {'professionals': len(professional_ids), 'sent': sent, 'failed': failed}
+    current_app.logger.info(
+        f"Daily reminder chunk {professional_ids[0]}-{professional_ids[-1]}: {sent} sent, {failed} failed"
+    )
+    return counts
 
-        return "Daily reminders sent successfully"
-    except Exception as e:
-        current_app.logger.error(f"Error sending daily reminders: {str(e)}")
-        raise
+@celery.task(base = taskContext)
+def summarize_reminders(chunk_counts):
+    """Total the per-chunk counts of a daily reminder run"""
+    return _summarize('Daily reminders', chunk_counts)
+
+def _summarize(job, chunk_counts):
+    totals = {'chunks': len(chunk_counts), 'sent': 0, 'failed': 0}
+    for counts in chunk_counts:
+        totals['sent'] += counts['sent']
+        totals['failed'] += counts['failed']
+    log = current_app.logger.warning if totals['failed'] else current_app.logger.info
+    log(f"{job} finished: {totals['sent']} sent, {totals['failed']} failed in {totals['chunks']} chunks")
+    return totals
+
+def email_template(name):
+    """A compiled email template from the app's Jinja cache.
+
+    The worker app lives for the whole process, so each template is parsed once
+    per worker; looking it up once per chunk also skips the per-render
+    up-to-date check that render_template does.
+    """
+    return current_app.jinja_env.get_template(name)
 
 @celery.task(base = taskContext)
 def send_monthly_reports():
-    """Generate and send monthly activity report to customers"""
-    try:
-        # Get all customers
-        customers = User.query.filter_by(role='customer').all()
-
-        # Get last month's date range
-        today = datetime.utcnow()
-        first_of_this_month = datetime(today.year, today.month, 1)
-        last_month_end = first_of_this_month - timedelta(days=1)
-        last_month_start = datetime(last_month_end.year, last_month_end.month, 1)
-
-        for customer in customers:
-            # Get customer's service requests for last month
-            requests = ServiceRequest.query.filter(
-                and_(
-                    ServiceRequest.customer_id == customer.id,
-                    ServiceRequest.created_at >= last_month_start,
-                    ServiceRequest.created_at < first_of_this_month
-                )
-            ).all()
-
-            # Calculate statistics
-            stats = {
-                'total_requests': len(requests),
-                'completed_requests': sum(1 for r in requests if r.status == 'completed'),
-                'pending_requests': sum(1 for r in requests if r.status == 'pending'),
-                'cancelled_requests': sum(1 for r in requests if r.status == 'cancelled'),
-                'total_spent': sum(r.service.base_price for r in requests if r.status == 'completed')
-            }
-
-            # Generate report
-            report_html = render_template(
-                'email/monthly_report.html',
-                customer=customer,
-                stats=stats,
-                requests=requests,
-                month=last_month_start.strftime('%B %Y'),
-                now=datetime.utcnow()
-            )
-
-            # Send report email
-            send_email(
-                subject=f"Your Monthly Activity Report - {last_month_start.strftime('%B %Y')}",
+    """Send last month's activity report to every customer, fanned out in chunks"""
+    today = datetime.utcnow()
+    first_of_this_month = datetime(today.year, today.month, 1)
+    last_month_end = first_of_this_month - timedelta(days=1)
+    last_month_start = datetime(last_month_end.year, last_month_end.month, 1)
+
+    customer_ids = db.session.scalars(
+        select(User.id).where(User.role == 'customer').order_by(User.id)
+    ).all()
+    size = current_app.config.get('MONTHLY_REPORT_CHUNK_SIZE', 500)
+    chunks = [customer_ids[i:i + size] for i in range(0, len(customer_ids), size)]
+    if not chunks:
+        current_app.logger.info("No customers, no monthly reports to send")
+        return {'customers': 0, 'chunks': 0}
+
+    window = (last_month_start.isoformat(), first_of_this_month.isoformat())
+    chord(send_report_chunk.s(chunk, *window) for chunk in chunks)(summarize_reports.s())
+    current_app.logger.info(f"Queued monthly reports for {len(customer_ids)} customers in {len(chunks)} chunks")
+    return {'customers': len(customer_ids), 'chunks': len(chunks)}
+
+def monthly_stats(customer_ids, start, end):
+    """Per-customer request counts and completed spend between start and end, in one grouped query"""
+    completed = ServiceRequest.status == 'completed'
+    rows = db.session.execute(
+        select(
+            ServiceRequest.customer_id,
+            func.count(ServiceRequest.id),
+            func.count(case((completed, 1))),
+            func.count(case((ServiceRequest.status == 'pending', 1))),
+            func.count(case((ServiceRequest.status == 'cancelled', 1))),
+            func.coalesce(func.sum(case((completed, Service.base_price))), 0)
+        )
+        .join(Service, Service.id == ServiceRequest.service_id)
+        .where(
+            ServiceRequest.customer_id.in_(customer_ids),
+            ServiceRequest.created_at >= start,
+            ServiceRequest.created_at < end
+        )
+        .group_by(ServiceRequest.customer_id)
+    )
+    return {
+        customer_id: {
+            'total_requests': total,
+            'completed_requests': completed_count,
+            'pending_requests': pending,
+            'cancelled_requests': cancelled,
+            'total_spent': spent
+        }
+        for customer_id, total, completed_count, pending, cancelled, spent in rows
+    }
+
+EMPTY_MONTH = {
+    'total_requests': 0, 'completed_requests': 0, 'pending_requests': 0,
+    'cancelled_requests': 0, 'total_spent': 0
+}
+
+@celery.task(base = taskContext)
+def send_report_chunk(customer_ids, start, end):
+    """Render and send the monthly reports for one chunk of customers and return its counts"""
+    start, end = datetime.fromisoformat(start), datetime.fromisoformat(end)
+    month = start.strftime('%B %Y')
+    customers = User.query.filter(User.id.in_(customer_ids)).order_by(User.id).all()
+    stats = monthly_stats(customer_ids, start, end)
+
+    requests_by_customer = {}
+    month_requests = ServiceRequest.query.filter(
+        ServiceRequest.customer_id.in_(customer_ids),
+        ServiceRequest.created_at >= start,
+        ServiceRequest.created_at < end
+    ).order_by(ServiceRequest.created_at).all()
+    # Held for the whole chunk so request.service in the template comes from the identity map
+    services = load_by_id(Service, {r.service_id for r in month_requests})
+    for r in month_requests:
+        requests_by_customer.setdefault(r.customer_id, []).append(r)
+
+    template = email_template('email/monthly_report.html')
+    now = datetime.utcnow()
+    messages = []
+    failed = 0
+    for customer in customers:
+        try:
+            messages.append(build_message(
+                subject=f"Your Monthly Activity Report - {month}",
                 recipients=[customer.email],
-                html_body=report_html
-            )
-            current_app.logger.info(f"Monthly report sent to {customer.email}")
+                html_body=template.render(
+                    customer=customer,
+                    stats=stats.get(customer.id, EMPTY_MONTH),
+                    requests=requests_by_customer.get(customer.id, []),
+                    month=month,
+                    now=now
+                )
+            ))
+        except Exception:
+            failed += 1
+            current_app.logger.exception(f"Could not render monthly report for customer {customer.id}")
 
-        return "Monthly reports sent successfully"
-    
-    except Exception as e:
-        current_app.logger.error(f"Error sending monthly reports: {str(e)}")
-        raise
+    sent = send_messages(messages)
+    failed += len(messages) - sent
+    current_app.logger.info(
+        f"Monthly report chunk {customer_ids[0]}-{customer_ids[-1]}: {sent} sent, {failed} failed"
+    )
+    return {'customers': len(customer_ids), 'sent': sent, 'failed': failed}
+
+@celery.task(base = taskContext)
+def summarize_reports(chunk_counts):
+    """Total the per-chunk counts of a monthly report run"""
+    return _summarize('Monthly reports', chunk_counts)
 
 @celery.task(base=taskContext)
-def generate_service_requests_csv():
-    """Generate a CSV file for all service requests."""
+def generate_service_requests_csv(export_format='csv', start_date=None, end_date=None, export_id=None,
+                                  mode='full', consumer=None, full_snapshot=False, fingerprint=None):
+    """Export service requests to a gzip file under EXPORT_FOLDER, named by export_id.
+
+    The matching id range is split into EXPORT_PARTITION_ROWS partitions written
+    by parallel export_partition subtasks, then joined in order by
+    finish_export. finish_export runs under export_id as its task id, so the
+    export's result can be looked up by the id handed to the caller. Without an
+    export_id (the nightly beat run) a fresh one is made; reusing this task's id
+    would make the two tasks overwrite each other's result.
+
+    In incremental mode only rows changed since consumer's watermark are
+    exported, and finish_export advances the watermark once the file is written.
+
+    fingerprint is the dedup claim taken by the caller (see claim_export); it is
+    kept for EXPORT_DEDUP_WINDOW after success and released if the export fails.
+    """
     try:
-        # Get all service requests from the database
-        service_requests = ServiceRequest.query.all()
-
-        # Prepare CSV content
-        output = StringIO()
-        writer = csv.writer(output)
-
-        # Write header
-        writer.writerow([
-            'ID', 'Customer', 'Service', 'Professional', 'Status', 'Address', 'Preferred Date', 'Created At', 'Completion Date', 'Actual Price'
-        ])
-
-        # Write service requests data
-        for request in service_requests:
-            writer.writerow([
-                request.id,
-                request.customer.name,
-                request.service.name,
-                request.professional.name if request.professional else 'Not Assigned',
-                request.status,
-                request.address,
-                request.preferred_date,
-                request.created_at.strftime('%Y-%m-%d'),
-                request.completed_at.strftime('%Y-%m-%d') if request.completed_at else '',
-                request.final_price
-            ])
-
-        # Store the CSV content in cache (using task ID as cache key)
-        cache_key = f"service_requests_csv_{generate_service_requests_csv.request.id}"
-        cache.set(cache_key, output.getvalue(), timeout=3600)  # Cache for 1 hour
-
-        # Return the cache key to the client
-        return cache_key
+        export_id = export_id or uuid.uuid4().hex
+        params = {'export_format': export_format, 'start_date': start_date, 'end_date': end_date}
+        watermark = None
+        if mode == 'incremental':
+            updated_after, updated_until, full = plan_incremental(consumer, full_snapshot)
+            if not full:
+                params.update(updated_after=updated_after, updated_until=updated_until)
+            watermark = {'consumer': consumer, 'until': updated_until, 'full': full}
+
+        partitions = plan_partitions(export_filters(**params), current_app.config.get('EXPORT_PARTITION_ROWS', 250000))
+        current_app.logger.info(f"Exporting service requests {params} in {len(partitions)} partitions")
+        callback = finish_export.s(export_id, export_format, watermark, fingerprint).set(task_id=export_id)
+        if fingerprint:
+            # Runs when any partition or the callback fails
+            callback.on_error(release_export.si(fingerprint, export_id))
+        chord(
+            export_partition.s(export_id, index, id_range, params) for index, id_range in enumerate(partitions)
+        )(callback)
+        return {'export_id': export_id, 'partitions': len(partitions)}
 
     except Exception as e:
         current_app.logger.error(f"Error generating CSV: {str(e)}")
+        if fingerprint:
+            release_export_claim(fingerprint, export_id)
         raise
+
+def _part_path(export_id, index):
+    return export_path(export_id, f'.part{index:05d}.gz')
+
+@celery.task(base=taskContext)
+def export_partition(export_id, index, id_range, params):
+    """Write the rows of one id range to a gzip part file and return the row count"""
+    rows = write_export(
+        _part_path(export_id, index),
+        export_query(export_filters(**params), id_range),
+        params['export_format'],
+        header=index == 0
+    )
+    current_app.logger.info(f"Export {export_id} partition {index} {id_range}: {rows} rows")
+    return rows
+
+@celery.task(base=taskContext)
+def finish_export(partition_rows, export_id, export_format, watermark=None, fingerprint=None):
+    """Concatenate the part files of an export in partition order and advance the consumer's watermark"""
+    path = export_path(export_id, f'.{export_format}.gz')
+    concatenate_parts(path, [_part_path(export_id, index) for index in range(len(partition_rows))])
+    rows = sum(partition_rows)
+    result = {'rows': rows, 'file': os.path.basename(path)}
+    if watermark:
+        advance_watermark(watermark['consumer'], watermark['until'], watermark['full'], export_id)
+        result.update(
+            consumer=watermark['consumer'], snapshot=watermark['full'], watermark=watermark['until']
+        )
+    if fingerprint:
+        complete_export_claim(fingerprint, export_id)
+    current_app.logger.info(f"Exported {rows} service requests to {path}")
+    return result
+
+@celery.task(base=taskContext)
+def release_export(fingerprint, export_id):
+    """Let a failed export be requested again right away"""
+    release_export_claim(fingerprint, export_id)
+    current_app.logger.warning(f"Export {export_id} failed; released its dedup claim")
+
+@celery.task(base=taskContext)
+def cleanup_exports():
+    """Delete export files older than EXPORT_MAX_AGE"""
+    removed = remove_expired_exports(current_app.config.get('EXPORT_MAX_AGE', 24 * 3600))
+    current_app.logger.info(f"Removed {removed} expired exports")
+    return removed
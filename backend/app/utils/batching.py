@@ -0,0 +1,17 @@
+# Keep IN lists well under the bound-parameter limits of SQLite and Postgres
+IN_CLAUSE_BATCH_SIZE = 500
+
+def load_in_batches(query, column, ids):
+    """Yield rows of query whose column is in ids, one IN query per batch."""
+    ids = list(ids)
+    for start in range(0, len(ids), IN_CLAUSE_BATCH_SIZE):
+        batch = ids[start:start + IN_CLAUSE_BATCH_SIZE]
+        yield from query.filter(column.in_(batch)).all()
+
+def load_by_id(model, ids):
+    """{id: object} for the model rows with these ids, loaded in batches.
+
+    Holding the dict keeps the objects in the session's identity map, so
+    many-to-one relationships pointing at them load without a query.
+    """
+    return {obj.id: obj for obj in load_in_batches(model.query, model.id, ids)}
@@ -0,0 +1,140 @@
+import hashlib
+import uuid
+from functools import wraps
+from flask import current_app, has_app_context, make_response, request
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import event, inspect, or_, select
+from app.extensions import cache, db
+from app.models import Review, Service, ServiceRequest, User
+
+def _tag_key(tag):
+    return f'tag:{tag}'
+
+def tag_versions(tags):
+    """Current version token of each tag, creating tokens for unknown tags."""
+    keys = [_tag_key(tag) for tag in tags]
+    versions = list(cache.get_many(*keys))
+    for i, version in enumerate(versions):
+        if version is None:
+            # A fresh random token can never match an entry cached under an evicted one
+            token = uuid.uuid4().hex
+            cache.add(keys[i], token, timeout=0)
+            # A backend that stores nothing (NullCache) still gets a usable, never-matching token
+            versions[i] = cache.get(keys[i]) or token
+    return versions
+
+def bump_tags(tags):
+    """Invalidate every response cached under any of tags."""
+    cache.set_many({_tag_key(tag): uuid.uuid4().hex for tag in tags}, timeout=0)
+
+def cached_response(*tags, timeout=None):
+    """Cache a GET view's response per principal until one of its tags is bumped.
+
+    tags are format strings filled in with the JWT identity, for example
+    'requests:customer:{user_id}'. Write hooks bump the matching tags when
+    the data changes, so cached responses are never stale.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            user_id = get_jwt_identity()
+            resolved = [tag.format(user_id=user_id) for tag in tags]
+
+            # Read tag versions before the view reads the database, so a write that
+            # lands mid-request bumps the tags past the entry stored below
+            versions = tag_versions(resolved)
+            digest = hashlib.sha1(
+                '|'.join([request.full_path, str(user_id)] + versions).encode('utf-8')
+            ).hexdigest()
+            key = f'view:{request.endpoint}:{digest}'
+
+            cached = cache.get(key)
+            if cached is not None:
+                body, mimetype = cached
+                return current_app.response_class(body, mimetype=mimetype)
+
+            response = make_response(f(*args, **kwargs))
+            if response.status_code == 200 and not response.is_streamed:
+                cache.set(
+                    key,
+                    (response.get_data(), response.mimetype),
+                    timeout=timeout or current_app.config.get('DASHBOARD_CACHE_TIMEOUT')
+                )
+            return response
+        return decorated_function
+    return decorator
+
+def _previous(obj, attr):
+    history = inspect(obj).attrs[attr].history
+    return history.deleted[0] if history.deleted else None
+
+def _tags_for(obj):
+    if isinstance(obj, ServiceRequest):
+        tags = {'requests:all', f'requests:customer:{obj.customer_id}'}
+        for professional_id in (obj.professional_id, _previous(obj, 'professional_id')):
+            if professional_id is not None:
+                tags.add(f'requests:professional:{professional_id}')
+        return tags
+    if isinstance(obj, Review):
+        return {f'requests:customer:{obj.user_id}', f'requests:professional:{obj.professional_id}'}
+    if isinstance(obj, User):
+        # users:all only backs the admin dashboard; per-user dashboards depend on user:{id}
+        return {'users:all', f'user:{obj.id}'}
+    if isinstance(obj, Service):
+        return {'services:all'}
+    return set()
+
+# User.to_dict() fields that dashboards show for the other party of a request. updated_at
+# is left out: it also moves on writes nothing renders, such as a password rehash
+RENDERED_USER_FIELDS = tuple(field for field in User.FIELDS if field not in ('id', 'updated_at'))
+
+def _rendered_change(user):
+    state = inspect(user)
+    return any(state.attrs[field].history.has_changes() for field in RENDERED_USER_FIELDS)
+
+def _counterpart_tags(session, user_ids):
+    """Request tags of everyone sharing a service request with one of user_ids.
+
+    Their dashboards embed these users, so they go stale when one of them changes.
+    """
+    rows = session.execute(
+        select(ServiceRequest.customer_id, ServiceRequest.professional_id)
+        .where(or_(ServiceRequest.customer_id.in_(user_ids), ServiceRequest.professional_id.in_(user_ids)))
+        .distinct()
+    )
+    tags = set()
+    for customer_id, professional_id in rows:
+        if professional_id in user_ids:
+            tags.add(f'requests:customer:{customer_id}')
+        if customer_id in user_ids and professional_id is not None:
+            tags.add(f'requests:professional:{professional_id}')
+    return tags
+
+@event.listens_for(db.session, 'after_flush')
+def _collect_tags(session, flush_context):
+    tags = session.info.setdefault('cache_tags', set())
+    # New users have no requests yet, so only changed and deleted ones can reach other dashboards
+    shown_elsewhere = set()
+    for obj in session.new:
+        tags.update(_tags_for(obj))
+    for obj in session.deleted:
+        tags.update(_tags_for(obj))
+        if isinstance(obj, User):
+            shown_elsewhere.add(obj.id)
+    for obj in session.dirty:
+        if session.is_modified(obj):
+            tags.update(_tags_for(obj))
+            if isinstance(obj, User) and _rendered_change(obj):
+                shown_elsewhere.add(obj.id)
+    if shown_elsewhere:
+        tags.update(_counterpart_tags(session, shown_elsewhere))
+
+@event.listens_for(db.session, 'after_commit')
+def _bump_collected_tags(session):
+    tags = session.info.pop('cache_tags', None)
+    if tags and has_app_context():
+        bump_tags(tags)
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_collected_tags(session):
+    session.info.pop('cache_tags', None)
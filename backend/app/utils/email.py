@@ -1,33 +1,171 @@
+import logging
+import os
+import queue
+import smtplib
+import threading
+import time
+from contextlib import ExitStack
 from flask import current_app
 from flask_mail import Message
 from app.extensions import mail
-from threading import Thread
 
-def send_async_email(app, msg):
-    """Send email asynchronously."""
-    with app.app_context():
-        try:
-            mail.send(msg)
-        except Exception as e:
-            current_app.logger.error(f"Failed to send email: {str(e)}")
+logger = logging.getLogger(__name__)
 
-def send_email(subject, recipients, html_body, text_body=None, sender=None):
-    """Send an email."""
+def is_transient(error):
+    """Dropped connections, socket errors and 4xx replies are worth another attempt."""
+    if isinstance(error, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError)):
+        return True
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    # SMTPException subclasses OSError; anything else left is a socket error
+    return not isinstance(error, smtplib.SMTPException)
+
+class RateLimiter:
+    """Space calls at least 1/rate seconds apart across threads; rate 0 means unlimited."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self.next_slot = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+class SMTPSender:
+    """Send messages over one reused SMTP connection with retry and backoff.
+
+    Flask-Mail reconnects by itself every MAIL_MAX_EMAILS messages. Needs an
+    app context.
+    """
+
+    def __init__(self, rate_limiter):
+        config = current_app.config
+        self.rate_limiter = rate_limiter
+        self.max_retries = config.get('MAIL_MAX_RETRIES', 3)
+        self.backoff = config.get('MAIL_RETRY_BACKOFF', 1.0)
+        self.stack = None
+        self.connection = None
+
+    def send(self, message):
+        """Deliver message; returns False once retries are exhausted, the server rejects it or it can't be sent."""
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.wait()
+            try:
+                if self.connection is None:
+                    self.stack = ExitStack()
+                    self.connection = self.stack.enter_context(mail.connect())
+                self.connection.send(message)
+                return True
+            except OSError as e:
+                if not is_transient(e):
+                    logger.error('email to %s rejected: %s', message.recipients, e)
+                    return False
+                self.close()
+                if attempt == self.max_retries:
+                    logger.error('giving up on email to %s after %d attempts: %s', message.recipients, attempt + 1, e)
+                    return False
+                time.sleep(self.backoff * 2 ** attempt)
+            except Exception:
+                # A bad header, missing recipient or encoding error fails this message only;
+                # start the next one on a fresh connection in case this one was left mid-command
+                logger.exception('email to %s failed', message.recipients)
+                self.close()
+                return False
+
+    def close(self):
+        if self.stack is not None:
+            try:
+                self.stack.close()
+            except (smtplib.SMTPException, OSError):
+                pass  # the connection is already gone
+        self.stack = self.connection = None
+
+class EmailDispatcher:
+    """A bounded queue of messages drained by MAIL_DISPATCH_WORKERS threads.
+
+    Each worker keeps its SMTP connection open while there is work and
+    closes it after MAIL_IDLE_TIMEOUT seconds without messages. submit()
+    blocks when MAIL_QUEUE_SIZE messages are waiting.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.pid = os.getpid()
+        self.queue = queue.Queue(maxsize=app.config.get('MAIL_QUEUE_SIZE', 1000))
+        self.rate_limiter = RateLimiter(app.config.get('MAIL_RATE_LIMIT', 0))
+        self.idle_timeout = app.config.get('MAIL_IDLE_TIMEOUT', 5)
+        self.threads = [
+            threading.Thread(target=self._work, name=f'email-dispatch-{i}', daemon=True)
+            for i in range(app.config.get('MAIL_DISPATCH_WORKERS', 2))
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, message):
+        self.queue.put(message)
+
+    def join(self):
+        """Wait until every submitted message has been handled."""
+        self.queue.join()
+
+    def _work(self):
+        with self.app.app_context():
+            sender = SMTPSender(self.rate_limiter)
+            while True:
+                try:
+                    message = self.queue.get(timeout=self.idle_timeout)
+                except queue.Empty:
+                    sender.close()
+                    continue
+                try:
+                    sender.send(message)
+                except Exception:
+                    logger.exception('failed to send email to %s', message.recipients)
+                finally:
+                    self.queue.task_done()
+
+_dispatcher_lock = threading.Lock()
+
+def get_dispatcher():
+    """The current app's dispatcher, started on first use in this process."""
+    app = current_app._get_current_object()
+    with _dispatcher_lock:
+        dispatcher = app.extensions.get('email_dispatcher')
+        # Threads don't survive fork, so a dispatcher inherited from a parent process is dead
+        if dispatcher is None or dispatcher.pid != os.getpid():
+            app.extensions['email_dispatcher'] = EmailDispatcher(app)
+    return app.extensions['email_dispatcher']
+
+def build_message(subject, recipients, html_body, text_body=None, sender=None):
     if not isinstance(recipients, list):
         recipients = [recipients]
-    
+
     msg = Message(
         subject=subject,
         recipients=recipients,
         sender=sender or current_app.config['MAIL_DEFAULT_SENDER']
     )
-    
+
     msg.html = html_body
     if text_body:
         msg.body = text_body
-    
-    # Send email in a background thread
-    Thread(
-        target=send_async_email,
-        args=(current_app._get_current_object(), msg)
-    ).start() 
\ No newline at end of file
+    return msg
+
+def send_email(subject, recipients, html_body, text_body=None, sender=None):
+    """Queue an email for the background dispatcher."""
+    get_dispatcher().submit(build_message(subject, recipients, html_body, text_body, sender))
+
+def send_messages(messages):
+    """Send messages now, over one connection in the calling thread; returns how many were sent."""
+    sender = SMTPSender(RateLimiter(current_app.config.get('MAIL_RATE_LIMIT', 0)))
+    try:
+        return sum(sender.send(message) for message in messages)
+    finally:
+        sender.close()
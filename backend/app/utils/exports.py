@@ -0,0 +1,306 @@
+import csv
+import gzip
+import hashlib
+import io
+import json
+import math
+import os
+import re
+import shutil
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from flask import current_app
+from sqlalchemy import func
+from sqlalchemy.orm import aliased
+from werkzeug.utils import safe_join
+from app.extensions import cache, db
+from app.models import ExportWatermark, Service, ServiceRequest, User
+
+CSV_HEADER = [
+    'ID', 'Customer', 'Service', 'Professional', 'Status', 'Address', 'Preferred Date',
+    'Created At', 'Completion Date', 'Actual Price'
+]
+NDJSON_FIELDS = (
+    'id', 'customer', 'service', 'professional', 'status', 'address', 'preferred_date',
+    'created_at', 'completed_at', 'final_price'
+)
+EXPORT_FORMATS = ('csv', 'ndjson')
+EXPORT_MODES = ('full', 'incremental')
+CONSUMER_NAME = re.compile(r'^[\w.-]{1,100}$')
+
+# Level 6 compresses CSV nearly as well as 9 at a fraction of the CPU
+GZIP_LEVEL = 6
+
+class ExportError(ValueError):
+    """Export parameters that can't be used."""
+
+def export_params(data):
+    """Validate export request parameters.
+
+    export_format is 'csv' or 'ndjson'. mode 'full' (the default) exports every
+    row, optionally limited to start_date..end_date (YYYY-MM-DD, inclusive, on
+    created_at). mode 'incremental' exports the rows changed since consumer's
+    last export; full_snapshot forces a complete export for that consumer.
+    """
+    export_format = data.get('export_format') or 'csv'
+    if export_format not in EXPORT_FORMATS:
+        raise ExportError(f"export_format must be one of {', '.join(EXPORT_FORMATS)}")
+    mode = data.get('mode') or 'full'
+    if mode not in EXPORT_MODES:
+        raise ExportError(f"mode must be one of {', '.join(EXPORT_MODES)}")
+    params = {'export_format': export_format}
+
+    if mode == 'incremental':
+        consumer = data.get('consumer')
+        if not isinstance(consumer, str) or not CONSUMER_NAME.match(consumer):
+            raise ExportError('incremental exports need a consumer name of letters, digits, _, . or -')
+        if data.get('start_date') or data.get('end_date'):
+            raise ExportError('start_date and end_date apply to full exports only')
+        params.update(mode=mode, consumer=consumer)
+        if data.get('full_snapshot'):
+            params['full_snapshot'] = True
+        return params
+
+    for key in ('start_date', 'end_date'):
+        value = data.get(key)
+        if value:
+            try:
+                params[key] = date.fromisoformat(value).isoformat()
+            except (TypeError, ValueError):
+                raise ExportError(f'{key} must be a YYYY-MM-DD date')
+    if params.get('start_date') and params.get('end_date') and params['start_date'] > params['end_date']:
+        raise ExportError('start_date is after end_date')
+    return params
+
+def export_filters(start_date=None, end_date=None, updated_after=None, updated_until=None, **ignored):
+    """Conditions for the created_at range and updated_at window in export params."""
+    filters = []
+    if start_date:
+        filters.append(ServiceRequest.created_at >= date.fromisoformat(start_date))
+    if end_date:
+        filters.append(ServiceRequest.created_at < date.fromisoformat(end_date) + timedelta(days=1))
+    if updated_after:
+        filters.append(ServiceRequest.updated_at > datetime.fromisoformat(updated_after))
+    if updated_until:
+        filters.append(ServiceRequest.updated_at <= datetime.fromisoformat(updated_until))
+    return filters
+
+def plan_incremental(consumer, full_snapshot=False):
+    """(updated_after, updated_until, full) bounds for the next incremental export of consumer.
+
+    Rows changed in the last EXPORT_WATERMARK_LAG seconds are left for the next
+    run, since a transaction still in flight may commit rows stamped inside that
+    window. A full snapshot is taken when asked for, when the consumer has never
+    had one, or when its last one is older than EXPORT_FULL_SNAPSHOT_DAYS (0 = never).
+    """
+    config = current_app.config
+    until = datetime.utcnow() - timedelta(seconds=config.get('EXPORT_WATERMARK_LAG', 60))
+    state = db.session.get(ExportWatermark, consumer)
+    snapshot_days = config.get('EXPORT_FULL_SNAPSHOT_DAYS', 7)
+    full = (
+        full_snapshot
+        or state is None or state.watermark is None or state.last_full_at is None
+        or (snapshot_days and state.last_full_at < until - timedelta(days=snapshot_days))
+    )
+    after = None if full else state.watermark.isoformat()
+    return after, until.isoformat(), bool(full)
+
+def advance_watermark(consumer, until, full, export_id):
+    """Record a finished incremental export; the watermark only ever moves forward."""
+    until = datetime.fromisoformat(until)
+    state = db.session.get(ExportWatermark, consumer)
+    if state is None:
+        state = ExportWatermark(consumer=consumer)
+        db.session.add(state)
+    if state.watermark is None or until > state.watermark:
+        state.watermark = until
+        state.last_export_id = export_id
+    if full:
+        state.last_full_at = max(until, state.last_full_at or until)
+    db.session.commit()
+
+def export_fingerprint(params):
+    """Stable hash of validated export params; equal requests share a fingerprint."""
+    canonical = json.dumps(params, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:32]
+
+def _job_key(fingerprint):
+    return f'export:job:{fingerprint}'
+
+def claim_export(fingerprint):
+    """(export_id, started) for a request with this fingerprint.
+
+    cache.add is atomic on Redis, so of several concurrent callers exactly one
+    gets started=True and a new export id; the rest get the id of the export
+    already running, or of one that finished within EXPORT_DEDUP_WINDOW. The
+    claim lasts EXPORT_LOCK_TIMEOUT so a lost worker can't block exports forever.
+    """
+    key = _job_key(fingerprint)
+    for _ in range(3):
+        export_id = str(uuid.uuid4())
+        if cache.add(key, export_id, timeout=current_app.config.get('EXPORT_LOCK_TIMEOUT', 2 * 3600)):
+            return export_id, True
+        existing = cache.get(key)
+        if existing is not None:
+            return existing, False
+        # The claim expired between add and get; try again
+    raise RuntimeError('could not claim export job')
+
+def complete_export_claim(fingerprint, export_id):
+    """Keep handing out export_id for EXPORT_DEDUP_WINDOW seconds after it finished."""
+    window = current_app.config.get('EXPORT_DEDUP_WINDOW', 300)
+    if window > 0:
+        cache.set(_job_key(fingerprint), export_id, timeout=window)
+    else:
+        release_export_claim(fingerprint, export_id)
+
+def release_export_claim(fingerprint, export_id):
+    """Drop the claim after a failure, unless a newer export has taken it over."""
+    key = _job_key(fingerprint)
+    if cache.get(key) == export_id:
+        cache.delete(key)
+
+def export_path(export_id, suffix='.csv.gz'):
+    """Where the export file for export_id lives, or None if export_id is not a safe file name."""
+    folder = current_app.config['EXPORT_FOLDER']
+    return safe_join(folder, f'service_requests_{export_id}{suffix}')
+
+def find_export(export_id):
+    """(path, format) of a finished export, or (None, None)."""
+    for export_format in EXPORT_FORMATS:
+        path = export_path(export_id, f'.{export_format}.gz')
+        if path is not None and os.path.isfile(path):
+            return path, export_format
+    return None, None
+
+def plan_partitions(filters, partition_rows):
+    """Split the matching id range into [lo, hi) ranges of about partition_rows rows each.
+
+    Ranges are equal slices of the id span, so they hold about the same number
+    of rows as long as ids are dense. With no matching rows there is one empty
+    range, so the export still gets its header.
+    """
+    low, high, rows = db.session.query(
+        func.min(ServiceRequest.id), func.max(ServiceRequest.id), func.count(ServiceRequest.id)
+    ).filter(*filters).one()
+    if not rows:
+        return [(0, 0)]
+    count = max(1, math.ceil(rows / partition_rows))
+    span = high - low + 1
+    bounds = [low + span * i // count for i in range(count)] + [high + 1]
+    return list(zip(bounds, bounds[1:]))
+
+def export_query(filters=(), id_range=None):
+    """Export rows in id order, names joined in rather than lazy-loaded per row."""
+    customer = aliased(User)
+    professional = aliased(User)
+    query = (
+        db.session.query(
+            ServiceRequest.id, customer.name, Service.name, professional.name,
+            ServiceRequest.status, ServiceRequest.address, ServiceRequest.preferred_date,
+            ServiceRequest.created_at, ServiceRequest.completed_at, ServiceRequest.final_price
+        )
+        .outerjoin(customer, customer.id == ServiceRequest.customer_id)
+        .outerjoin(Service, Service.id == ServiceRequest.service_id)
+        .outerjoin(professional, professional.id == ServiceRequest.professional_id)
+        .filter(*filters)
+        .order_by(ServiceRequest.id)
+    )
+    if id_range is not None:
+        query = query.filter(ServiceRequest.id >= id_range[0], ServiceRequest.id < id_range[1])
+    return query
+
+def csv_row(row):
+    request_id, customer, service, professional, status, address, preferred, created, completed, price = row
+    return [
+        request_id,
+        customer,
+        service,
+        professional or 'Not Assigned',
+        status,
+        address,
+        preferred,
+        created.strftime('%Y-%m-%d') if created else '',
+        completed.strftime('%Y-%m-%d') if completed else '',
+        price
+    ]
+
+def _write_csv(f, rows, header):
+    text = io.TextIOWrapper(f, encoding='utf-8', newline='')
+    writer = csv.writer(text)
+    if header:
+        writer.writerow(CSV_HEADER)
+    count = 0
+    for row in rows:
+        writer.writerow(csv_row(row))
+        count += 1
+    text.flush()
+    text.detach()
+    return count
+
+def _write_ndjson(f, rows, header):
+    dumps = current_app.json.dumps_bytes
+    count = 0
+    for row in rows:
+        f.write(dumps(dict(zip(NDJSON_FIELDS, row))) + b'\n')
+        count += 1
+    return count
+
+WRITERS = {'csv': _write_csv, 'ndjson': _write_ndjson}
+
+def write_export(path, query, export_format='csv', header=True):
+    """Stream query into a gzip file at path and return the number of rows written.
+
+    Rows are fetched EXPORT_BATCH_SIZE at a time and written straight to disk,
+    so memory stays flat however large the table is. The file is built under a
+    temporary name and renamed into place, so a reader never sees a partial export.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    partial = f'{path}.{os.getpid()}.partial'
+    try:
+        with gzip.open(partial, 'wb', compresslevel=GZIP_LEVEL) as f:
+            rows = query.yield_per(current_app.config.get('EXPORT_BATCH_SIZE', 1000))
+            count = WRITERS[export_format](f, rows, header)
+        os.replace(partial, path)
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    return count
+
+def concatenate_parts(path, parts):
+    """Join gzip part files into path, in order, and delete the parts.
+
+    A sequence of gzip members is itself a valid gzip file, so the parts are
+    copied byte for byte without being decompressed.
+    """
+    partial = f'{path}.{os.getpid()}.partial'
+    try:
+        with open(partial, 'wb') as out:
+            for part in parts:
+                with open(part, 'rb') as f:
+                    shutil.copyfileobj(f, out, 1024 * 1024)
+        os.replace(partial, path)
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    for part in parts:
+        os.remove(part)
+
+def remove_expired_exports(max_age):
+    """Delete export and part files older than max_age seconds; returns how many were removed."""
+    folder = current_app.config['EXPORT_FOLDER']
+    if not os.path.isdir(folder):
+        return 0
+    cutoff = time.time() - max_age
+    removed = 0
+    for entry in os.scandir(folder):
+        if entry.is_file() and entry.name.startswith('service_requests_') and entry.stat().st_mtime < cutoff:
+            try:
+                os.remove(entry.path)
+                removed += 1
+            except FileNotFoundError:
+                pass  # removed by a concurrent cleanup
+    return removed
@@ -0,0 +1,29 @@
+from flask import request
+
+def requested_columns(model, fields, extra=None):
+    """Map the ?fields= query parameter onto labelled column expressions.
+
+    Only names listed in fields (or keys of extra, for computed columns) may
+    be selected. Returns None when no fields were requested so callers can
+    fall back to the full to_dict() payload, and raises ValueError for
+    fields that are not exposed.
+    """
+    raw = request.args.get('fields')
+    if not raw:
+        return None
+
+    allowed = {name: getattr(model, name) for name in fields}
+    allowed.update(extra or {})
+
+    names = list(dict.fromkeys(name.strip() for name in raw.split(',') if name.strip()))
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+    if not names:
+        raise ValueError('No fields requested')
+
+    return [allowed[name].label(name) for name in names]
+
+def project(query, columns):
+    """Run query selecting only columns and return plain dicts (no ORM objects)."""
+    return [row._asdict() for row in query.with_entities(*columns)]
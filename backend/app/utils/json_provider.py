@@ -0,0 +1,98 @@
+from datetime import date, datetime
+import decimal
+import uuid
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional C-accelerated backend
+    orjson = None
+
+def _default(o):
+    """Encode types the json module doesn't know, with ISO 8601 datetimes.
+
+    Stored datetimes are naive UTC (datetime.utcnow), so they get an
+    explicit +00:00 offset to keep browsers from reading them as local time.
+    """
+    if isinstance(o, datetime):
+        if o.tzinfo is None:
+            return o.isoformat() + '+00:00'
+        return o.isoformat()
+
+    if isinstance(o, date):
+        return o.isoformat()
+
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+
+    raise TypeError(f'Object of type {type(o).__name__} is not JSON serializable')
+
+def _orjson_default(o):
+    # orjson handles datetime, date, UUID and dataclasses natively
+    if isinstance(o, decimal.Decimal):
+        return str(o)
+
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+
+    raise TypeError(f'Object of type {type(o).__name__} is not JSON serializable')
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON provider with native datetime encoding and an optional orjson backend.
+
+    Set JSON_BACKEND to 'stdlib' to force the json module, or leave it at
+    'auto' to use orjson whenever it is installed. Both backends produce
+    the same bytes: key-sorted, compact, raw UTF-8 and the same datetime format.
+    """
+
+    default = staticmethod(_default)
+    # orjson always writes raw UTF-8; match it instead of escaping non-ASCII as \uXXXX
+    ensure_ascii = False
+
+    def __init__(self, app):
+        super().__init__(app)
+        backend = app.config.get('JSON_BACKEND', 'auto')
+        if backend not in ('auto', 'orjson', 'stdlib'):
+            raise ValueError(f'Unknown JSON_BACKEND: {backend}')
+        if backend == 'orjson' and orjson is None:
+            raise RuntimeError('JSON_BACKEND is orjson but orjson is not installed')
+        self.use_orjson = orjson is not None and backend != 'stdlib'
+
+    def _orjson_options(self, indent=False):
+        options = orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps_bytes(self, obj, indent=False):
+        """Serialize obj straight to UTF-8 bytes, skipping the str round trip."""
+        if self.use_orjson:
+            return orjson.dumps(obj, default=_orjson_default, option=self._orjson_options(indent))
+        if indent:
+            return self.dumps(obj, indent=2).encode('utf-8')
+        return self.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+    def dumps(self, obj, **kwargs):
+        # orjson only covers the compact/indent-2 shapes Flask itself asks for
+        if self.use_orjson and kwargs in ({'indent': 2}, {'separators': (',', ':')}):
+            return self.dumps_bytes(obj, indent='indent' in kwargs).decode('utf-8')
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if self.use_orjson and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(
+            self.dumps_bytes(obj, indent=indent) + b'\n',
+            mimetype=self.mimetype
+        )
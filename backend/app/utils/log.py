@@ -0,0 +1,120 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import uuid
+from logging.handlers import QueueHandler, QueueListener
+from flask import g, has_request_context, request
+from flask_jwt_extended import get_jwt_identity
+
+TEXT_FORMAT = '%(asctime)s %(levelname)s %(name)s [%(request_id)s user=%(user_id)s %(route)s] %(message)s'
+
+class RequestContextFilter(logging.Filter):
+    """Stamp records with the request id, user id and route, and sample debug records.
+
+    Runs on the calling thread, before the record is queued, while the request
+    context is still available. Debug records are kept for a LOG_DEBUG_SAMPLE_RATE
+    share of requests, chosen once per request so sampled requests log in full.
+    """
+
+    def __init__(self, debug_sample_rate=1.0):
+        super().__init__()
+        self.debug_sample_rate = debug_sample_rate
+
+    def filter(self, record):
+        record.request_id = record.user_id = record.route = '-'
+        if has_request_context():
+            record.request_id = g.get('request_id', '-')
+            record.route = request.endpoint or request.path
+            try:
+                record.user_id = get_jwt_identity() or '-'
+            except RuntimeError:  # no token verified for this request
+                pass
+
+        if record.levelno <= logging.DEBUG and self.debug_sample_rate < 1.0:
+            if has_request_context():
+                return g.get('log_debug', False)
+            return random.random() < self.debug_sample_rate
+        return True
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops records when the queue is full instead of blocking the caller."""
+
+    dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DroppingQueueHandler.dropped += 1
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'request_id': getattr(record, 'request_id', '-'),
+            'user_id': getattr(record, 'user_id', '-'),
+            'route': getattr(record, 'route', '-'),
+        }
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+_handler = None
+_listener = None
+
+def _start_listener(queue_size, formatter):
+    global _listener
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(formatter)
+    _handler.queue = queue.Queue(maxsize=queue_size)
+    _listener = QueueListener(_handler.queue, output, respect_handler_level=False)
+    _listener.start()
+
+def _stop_listener():
+    # Drain what is queued before the interpreter exits
+    if _listener is not None:
+        try:
+            _listener.stop()
+        except queue.Full:
+            pass
+
+def init_logging(app):
+    """Route all logging through a bounded queue drained by a background thread.
+
+    Handlers that do I/O run on the listener thread, so a log call on the
+    request path only formats the record and enqueues it. LOG_LEVEL sets the
+    root level, LOG_FORMAT picks 'text' or 'json' output and
+    LOG_DEBUG_SAMPLE_RATE keeps debug records for that share of requests.
+    """
+    global _handler
+    formatter = JSONFormatter() if app.config.get('LOG_FORMAT') == 'json' else logging.Formatter(TEXT_FORMAT)
+    queue_size = app.config.get('LOG_QUEUE_SIZE', 10000)
+
+    root = logging.getLogger()
+    root.setLevel(app.config.get('LOG_LEVEL', 'INFO'))
+    if _handler is None:
+        _handler = DroppingQueueHandler(queue.Queue())
+        _handler.addFilter(RequestContextFilter())
+        root.addHandler(_handler)
+        _start_listener(queue_size, formatter)
+        # The listener thread does not survive fork (gunicorn, celery prefork); start a new one
+        os.register_at_fork(after_in_child=lambda: _start_listener(queue_size, formatter))
+        atexit.register(_stop_listener)
+    _handler.filters[0].debug_sample_rate = app.config.get('LOG_DEBUG_SAMPLE_RATE', 1.0)
+
+    @app.before_request
+    def _assign_request_id():
+        g.request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex
+        g.log_debug = random.random() < _handler.filters[0].debug_sample_rate
+
+    @app.after_request
+    def _return_request_id(response):
+        response.headers['X-Request-ID'] = g.get('request_id', '')
+        return response
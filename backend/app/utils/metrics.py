@@ -0,0 +1,144 @@
+import logging
+import os
+import time
+from functools import wraps
+from flask import Response, g, request
+from flask_caching import Cache
+from sqlalchemy import event
+
+try:
+    import prometheus_client
+    from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, multiprocess
+except ImportError:  # metrics are optional
+    prometheus_client = None
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000)
+CHECKOUT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+if prometheus_client is not None:
+    # Under gunicorn, PROMETHEUS_MULTIPROC_DIR makes every worker write these to shared files
+    REQUEST_LATENCY = Histogram(
+        'http_request_duration_seconds', 'Time to produce a response (first byte for streams)',
+        ['method', 'blueprint', 'endpoint', 'status'], buckets=LATENCY_BUCKETS
+    )
+    RESPONSE_SIZE = Histogram(
+        'http_response_size_bytes', 'Response body size, streamed bodies excluded',
+        ['blueprint', 'endpoint'], buckets=SIZE_BUCKETS
+    )
+    IN_PROGRESS = Gauge(
+        'http_requests_in_progress', 'Requests being handled',
+        ['blueprint', 'endpoint'], multiprocess_mode='livesum'
+    )
+    POOL_CHECKOUT = Histogram(
+        'db_pool_checkout_seconds', 'Time spent waiting for a pooled database connection',
+        buckets=CHECKOUT_BUCKETS
+    )
+    # kind is the key prefix: view (cached responses), tag (their tag versions), auth, export
+    CACHE_LOOKUPS = Counter('cache_lookups_total', 'Cache reads by key kind and result', ['kind', 'result'])
+
+class MeteredCache(Cache):
+    """Flask-Caching Cache that counts hits and misses of get() and get_many().
+
+    Lookups are labelled with the key's prefix, so the response cache hit
+    ratio (kind="view") is not diluted by the tag-version and token-version
+    reads made on the way to it.
+    """
+
+    def get(self, key, *args, **kwargs):
+        value = super().get(key, *args, **kwargs)
+        _count_lookup(key, value)
+        return value
+
+    def get_many(self, *keys):
+        values = super().get_many(*keys)
+        for key, value in zip(keys, values):
+            _count_lookup(key, value)
+        return values
+
+def key_kind(key):
+    """The part of a cache key before its first ':' (view, tag, auth, ...)."""
+    kind, sep, _ = str(key).partition(':')
+    # Keys without a prefix share one label so they can't blow up the series count
+    return kind if sep else 'other'
+
+def _count_lookup(key, value):
+    if prometheus_client is None:
+        return
+    CACHE_LOOKUPS.labels(key_kind(key), 'miss' if value is None else 'hit').inc()
+
+def _route_labels():
+    # Unmatched URLs share one label so scanners can't blow up the series count
+    return request.blueprint or '', request.endpoint or 'unmatched'
+
+def _time_checkouts(pool):
+    """Wrap pool.connect so the wait for a connection is observed."""
+    connect = pool.connect
+    if getattr(connect, 'metered', False):
+        return
+
+    @wraps(connect)
+    def timed_connect():
+        started = time.perf_counter()
+        try:
+            return connect()
+        finally:
+            POOL_CHECKOUT.observe(time.perf_counter() - started)
+
+    timed_connect.metered = True
+    pool.connect = timed_connect
+
+def init_metrics(app):
+    """Record request and pool metrics and serve them at METRICS_PATH in Prometheus format."""
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+    if prometheus_client is None:
+        logger.warning('prometheus_client is not installed; %s is disabled', app.config.get('METRICS_PATH', '/metrics'))
+        return
+
+    from app.extensions import db
+
+    with app.app_context():
+        engine = db.engine
+    _time_checkouts(engine.pool)
+
+    # dispose() swaps in a fresh pool, which needs wrapping again
+    @event.listens_for(engine, 'engine_disposed')
+    def _rewrap_pool(engine):
+        _time_checkouts(engine.pool)
+
+    @app.before_request
+    def _start_request_metrics():
+        g.metrics_labels = _route_labels()
+        g.metrics_started = time.perf_counter()
+        IN_PROGRESS.labels(*g.metrics_labels).inc()
+
+    @app.after_request
+    def _observe_request_metrics(response):
+        labels = g.get('metrics_labels')
+        if labels is None:
+            return response
+        REQUEST_LATENCY.labels(request.method, *labels, response.status_code).observe(
+            time.perf_counter() - g.metrics_started
+        )
+        if not response.is_streamed and response.content_length is not None:
+            RESPONSE_SIZE.labels(*labels).observe(response.content_length)
+        return response
+
+    @app.teardown_request
+    def _finish_request_metrics(exc):
+        labels = g.pop('metrics_labels', None)
+        if labels is not None:
+            IN_PROGRESS.labels(*labels).dec()
+
+    def metrics():
+        if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = prometheus_client.REGISTRY
+        return Response(prometheus_client.generate_latest(registry), mimetype=prometheus_client.CONTENT_TYPE_LATEST)
+
+    app.add_url_rule(app.config.get('METRICS_PATH', '/metrics'), 'metrics', metrics)
@@ -0,0 +1,121 @@
+import base64
+import json
+from datetime import datetime
+from urllib.parse import urlencode
+from flask import current_app, jsonify, request
+from sqlalchemy import and_, or_
+from app.extensions import db
+
+class PaginationError(ValueError):
+    """Raised for a malformed ?limit= or ?cursor=."""
+
+class Page:
+    """One page of a keyset-paginated list."""
+
+    def __init__(self, items, next_cursor=None, total=None, total_estimated=False):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.total = total
+        self.total_estimated = total_estimated
+
+def encode_cursor(created_at, id):
+    raw = json.dumps([created_at.isoformat(), id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(id)
+    except (ValueError, TypeError):
+        raise PaginationError('Invalid cursor')
+
+def pagination_requested():
+    return 'limit' in request.args or 'cursor' in request.args
+
+def paginate(query, model, columns=None, descending=False):
+    """Fetch one page of query ordered by (created_at, id) after ?cursor=.
+
+    ?limit= sets the page size (PAGE_SIZE_DEFAULT, capped at PAGE_SIZE_MAX)
+    and ?total=1 adds a row count. Pages are selected with a keyset filter
+    instead of OFFSET, so deep pages cost the same as the first one. Items
+    are ORM objects, or plain dicts when columns are given. Raises
+    PaginationError for a bad limit or cursor.
+    """
+    try:
+        limit = int(request.args.get('limit', current_app.config['PAGE_SIZE_DEFAULT']))
+    except ValueError:
+        raise PaginationError('limit must be an integer')
+    limit = max(1, min(limit, current_app.config['PAGE_SIZE_MAX']))
+
+    total, total_estimated = None, False
+    if request.args.get('total') in ('1', 'true'):
+        total, total_estimated = count_rows(query)
+
+    created_at, id = model.created_at, model.id
+    if descending:
+        query = query.order_by(None).order_by(created_at.desc(), id.desc())
+    else:
+        query = query.order_by(None).order_by(created_at.asc(), id.asc())
+
+    cursor = request.args.get('cursor')
+    if cursor:
+        after_created_at, after_id = decode_cursor(cursor)
+        if descending:
+            query = query.filter(or_(
+                created_at < after_created_at,
+                and_(created_at == after_created_at, id < after_id)
+            ))
+        else:
+            query = query.filter(or_(
+                created_at > after_created_at,
+                and_(created_at == after_created_at, id > after_id)
+            ))
+
+    # One extra row tells us whether there is a next page
+    if columns:
+        rows = query.with_entities(
+            *columns, created_at.label('_cursor_created_at'), id.label('_cursor_id')
+        ).limit(limit + 1).all()
+        keys = [(row._cursor_created_at, row._cursor_id) for row in rows]
+        items = [row._asdict() for row in rows]
+        for item in items:
+            del item['_cursor_created_at'], item['_cursor_id']
+    else:
+        items = query.limit(limit + 1).all()
+        keys = [(item.created_at, item.id) for item in items]
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(*keys[limit - 1])
+
+    return Page(items, next_cursor, total, total_estimated)
+
+def count_rows(query):
+    """Count the rows of query; PostgreSQL uses the planner estimate instead of COUNT(*).
+
+    Returns (count, estimated).
+    """
+    query = query.order_by(None)
+    if db.engine.dialect.name == 'postgresql':
+        compiled = query.statement.compile(dialect=db.engine.dialect)
+        plan = db.session.connection().exec_driver_sql(
+            f'EXPLAIN (FORMAT JSON) {compiled}', compiled.params
+        ).scalar()
+        return int(plan[0]['Plan']['Plan Rows']), True
+    return query.count(), False
+
+def page_response(page, payload):
+    """jsonify payload and describe the page in headers, keeping the body a plain list."""
+    response = jsonify(payload)
+    if page.next_cursor:
+        response.headers['X-Next-Cursor'] = page.next_cursor
+        args = request.args.to_dict()
+        args['cursor'] = page.next_cursor
+        response.headers['Link'] = f'<{request.base_url}?{urlencode(args)}>; rel="next"'
+    if page.total is not None:
+        response.headers['X-Total-Count'] = str(page.total)
+        if page.total_estimated:
+            response.headers['X-Total-Count-Estimated'] = 'true'
+    return response
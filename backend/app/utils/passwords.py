@@ -0,0 +1,81 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app, has_app_context
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+# werkzeug's own defaults, used outside an app context
+DEFAULT_METHOD = 'scrypt:32768:8:1'
+DEFAULT_SALT_LENGTH = 16
+
+class PasswordVerifierBusy(RuntimeError):
+    """Raised when every verification slot is taken; the caller should answer 503."""
+
+def _config(name, default):
+    if has_app_context():
+        return current_app.config.get(name, default)
+    return default
+
+def normalize_method(method):
+    """Spell out werkzeug's implied parameters, e.g. 'scrypt:16384' -> 'scrypt:16384:8:1'.
+
+    The result is the method string werkzeug stores in the hash, so a hash
+    made with the configured method always compares equal to it.
+    """
+    name, *args = method.split(':')
+    if name == 'scrypt':
+        n, r, p = (args + ['32768', '8', '1'][len(args):])[:3]
+        return f'scrypt:{int(n)}:{int(r)}:{int(p)}'
+    if name == 'pbkdf2':
+        hash_name = args[0] if args else 'sha256'
+        iterations = args[1] if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS
+        return f'pbkdf2:{hash_name}:{int(iterations)}'
+    return method
+
+def hash_password(password):
+    """Hash with PASSWORD_HASH_METHOD and PASSWORD_SALT_LENGTH."""
+    return generate_password_hash(
+        password,
+        method=normalize_method(_config('PASSWORD_HASH_METHOD', DEFAULT_METHOD)),
+        salt_length=_config('PASSWORD_SALT_LENGTH', DEFAULT_SALT_LENGTH)
+    )
+
+def needs_rehash(password_hash):
+    """True if password_hash was made with another method or salt length than configured."""
+    method, _, rest = password_hash.partition('$')
+    salt = rest.partition('$')[0]
+    if len(salt) != _config('PASSWORD_SALT_LENGTH', DEFAULT_SALT_LENGTH):
+        return True
+    return normalize_method(method) != normalize_method(_config('PASSWORD_HASH_METHOD', DEFAULT_METHOD))
+
+_executor = None
+_slots = None
+_executor_lock = threading.Lock()
+
+def _verifier(workers, queue_size):
+    global _executor, _slots
+    with _executor_lock:
+        # Built lazily so each forked worker process gets its own threads
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-verify')
+            _slots = threading.BoundedSemaphore(workers + queue_size)
+    return _executor, _slots
+
+def verify_password(password_hash, password):
+    """check_password_hash, run in a bounded thread pool when PASSWORD_VERIFY_WORKERS is set.
+
+    hashlib releases the GIL while deriving keys, so verifications on the pool
+    run in parallel and the request thread only waits. When all workers are
+    busy and PASSWORD_VERIFY_QUEUE more calls are waiting, raises
+    PasswordVerifierBusy instead of piling up.
+    """
+    workers = _config('PASSWORD_VERIFY_WORKERS', 0)
+    if not workers:
+        return check_password_hash(password_hash, password)
+
+    executor, slots = _verifier(workers, _config('PASSWORD_VERIFY_QUEUE', 0))
+    if not slots.acquire(blocking=False):
+        raise PasswordVerifierBusy('Too many concurrent logins, retry shortly')
+    try:
+        return executor.submit(check_password_hash, password_hash, password).result()
+    finally:
+        slots.release()
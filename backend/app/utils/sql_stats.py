@@ -0,0 +1,103 @@
+import logging
+import re
+import time
+from collections import Counter
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Bound-parameter lists of any length, as expanded for IN (...) by the driver
+_PARAM_LIST = re.compile(r'\(\s*(?:\?|%\(\w+\)s)(?:\s*,\s*(?:\?|%\(\w+\)s))*\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+class QueryBudgetExceeded(RuntimeError):
+    """A view issued more SQL statements than its budget allows (raised in debug and testing)."""
+
+class RequestSQLStats:
+    """SQL statements issued while handling one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.slowest = (0.0, None)
+        self.shapes = Counter()
+
+    def record(self, statement, seconds):
+        self.count += 1
+        self.seconds += seconds
+        if seconds > self.slowest[0]:
+            self.slowest = (seconds, statement)
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated(self, threshold):
+        """Statement shapes run at least threshold times: N+1 candidates."""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+def statement_shape(statement):
+    """statement with whitespace and IN lists normalized, so repeats of one query compare equal."""
+    return _PARAM_LIST.sub('(?)', _WHITESPACE.sub(' ', statement).strip())
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    seconds = time.perf_counter() - conn.info['query_started'].pop()
+    if has_request_context():
+        stats = g.get('sql_stats')
+        if stats is not None:
+            stats.record(statement, seconds)
+
+@event.listens_for(Engine, 'handle_error')
+def _handle_error(context):
+    started = context.connection.info.get('query_started') if context.connection else None
+    if started:
+        started.pop()
+
+def init_sql_instrumentation(app):
+    """Collect per-request SQL stats, report them in Server-Timing and the log, and enforce budgets.
+
+    Statements run while a streamed body is generated happen after the
+    response is sent and are not counted.
+    """
+    if not app.config.get('SQL_INSTRUMENTATION', True):
+        return
+
+    @app.before_request
+    def _start_sql_stats():
+        g.sql_stats = RequestSQLStats()
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def _report_sql_stats(response):
+        stats = g.pop('sql_stats', None)
+        if stats is None:
+            return response
+        elapsed = time.perf_counter() - g.request_started
+        response.headers.add(
+            'Server-Timing',
+            f'db;dur={stats.seconds * 1000:.1f};desc="{stats.count} queries", app;dur={elapsed * 1000:.1f}'
+        )
+
+        slowest_seconds, slowest = stats.slowest
+        logger.info(
+            'sql endpoint=%s status=%s queries=%d sql_ms=%.1f total_ms=%.1f slowest_ms=%.1f slowest=%r',
+            request.endpoint, response.status_code, stats.count, stats.seconds * 1000,
+            elapsed * 1000, slowest_seconds * 1000, slowest and statement_shape(slowest)[:200]
+        )
+
+        for shape, n in stats.repeated(current_app.config.get('SQL_N_PLUS_ONE_THRESHOLD', 10)):
+            logger.warning('sql possible N+1 endpoint=%s repeats=%d statement=%r', request.endpoint, n, shape[:200])
+
+        budget = current_app.config.get('SQL_QUERY_BUDGETS', {}).get(
+            request.endpoint, current_app.config.get('SQL_QUERY_BUDGET_DEFAULT')
+        )
+        if budget is not None and stats.count > budget:
+            message = f'{request.endpoint} issued {stats.count} SQL statements, budget is {budget}'
+            if current_app.debug or current_app.testing:
+                raise QueryBudgetExceeded(message)
+            logger.warning('sql budget exceeded: %s', message)
+        return response
@@ -0,0 +1,61 @@
+import logging
+from itertools import chain, islice
+from flask import current_app, request, stream_with_context
+
+logger = logging.getLogger(__name__)
+
+def stream_json_array(query, serialize_batch=None):
+    """Stream query results as a JSON array without materializing the whole list.
+
+    Rows are fetched with yield_per(STREAM_BATCH_SIZE) and each batch is
+    handed to serialize_batch, which returns a list of JSON-ready dicts.
+    Without serialize_batch, rows are assumed to be column projections and
+    are emitted as plain dicts. The body is identical to jsonify() output.
+
+    The query runs and the first batch is encoded before this returns, so
+    errors there propagate to the caller, which can still answer with an
+    error status. A later failure can only be logged and re-raised, which
+    aborts the connection mid-body; clients must treat a body that does not
+    parse as a failed request.
+    """
+    batch_size = current_app.config.get('STREAM_BATCH_SIZE', 500)
+    provider = current_app.json
+    serialize_batch = serialize_batch or _rows_to_dicts
+
+    def generate():
+        rows = iter(query.yield_per(batch_size))
+        prefix = b'['
+        try:
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+                items = serialize_batch(batch)
+                if items:
+                    # Drop the brackets of the encoded batch and splice it into the array
+                    yield prefix + provider.dumps_bytes(items)[1:-1]
+                    prefix = b','
+        finally:
+            # Release the server-side cursor even when the body is abandoned part way
+            rows.close()
+        yield b'[]\n' if prefix == b'[' else b']\n'
+
+    chunks = generate()
+    first = next(chunks)
+    return current_app.response_class(
+        stream_with_context(_log_failures(chain([first], chunks))),
+        mimetype=provider.mimetype
+    )
+
+def _log_failures(chunks):
+    sent = 0
+    try:
+        for chunk in chunks:
+            yield chunk
+            sent += len(chunk)
+    except Exception:
+        logger.exception('streamed response of %s failed after %d bytes', request.endpoint, sent)
+        raise
+
+def _rows_to_dicts(rows):
+    return [row._asdict() for row in rows]
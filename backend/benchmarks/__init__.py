@@ -0,0 +1 @@
+"""Benchmarks for the Fixrify backend. Run modules from the backend directory, e.g. python -m benchmarks.bench_json."""
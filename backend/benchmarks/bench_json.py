@@ -0,0 +1,114 @@
+"""Compare JSON encode throughput on a bookings-shaped payload.
+
+Usage: python -m benchmarks.bench_json [--rows 10000] [--repeat 5]
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from app.utils.json_provider import FastJSONProvider, orjson
+
+def make_user(i, role):
+    user = {
+        'id': i,
+        'name': f'User {i}',
+        'email': f'user{i}@fixrify.com',
+        'phone': f'10000{i:05d}',
+        'role': role,
+        'is_active': True,
+        'is_approved': True,
+        'created_at': datetime(2024, 1, 1) + timedelta(minutes=i),
+        'updated_at': datetime(2024, 1, 2) + timedelta(minutes=i),
+        'last_login': None,
+        'login_count': i % 17
+    }
+    if role == 'professional':
+        user.update({
+            'services': ['Plumbing', 'Electrical'],
+            'experience': i % 10,
+            'about': 'Experienced professional',
+            'average_rating': 4.25,
+            'total_jobs': i % 50
+        })
+    return user
+
+def make_bookings(rows):
+    """Build a list shaped like ServiceRequest.to_dict_list() output."""
+    created = datetime(2024, 1, 1)
+    bookings = []
+    for i in range(rows):
+        bookings.append({
+            'id': i,
+            'customer_id': i % 500,
+            'service_id': i % 10,
+            'professional_id': i % 200,
+            'status': ('pending', 'accepted', 'completed', 'cancelled')[i % 4],
+            'address': f'{i} Main Street, Springfield',
+            'preferred_date': created + timedelta(days=i % 30),
+            'notes': 'Please call before arriving.',
+            'final_price': 100.0 + i % 50,
+            'created_at': created + timedelta(seconds=i),
+            'updated_at': created + timedelta(seconds=i, microseconds=123),
+            'completed_at': created + timedelta(days=2) if i % 4 == 2 else None,
+            'service': {
+                'id': i % 10,
+                'name': 'Plumbing',
+                'category': 'Home Improvement',
+                'description': 'Pipes and fittings',
+                'base_price': 100.0,
+                'image_url': None,
+                'is_active': True,
+                'created_at': created,
+                'updated_at': created
+            },
+            'customer': make_user(i % 500, 'customer'),
+            'reviews': [],
+            'professional': make_user(i % 200, 'professional')
+        })
+    return bookings
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    payload = make_bookings(args.rows)
+    compact = {'separators': (',', ':')}
+
+    app = Flask(__name__)
+    providers = {'flask-default': DefaultJSONProvider(app)}
+    app.config['JSON_BACKEND'] = 'stdlib'
+    providers['fast-stdlib'] = FastJSONProvider(app)
+    if orjson is not None:
+        app.config['JSON_BACKEND'] = 'orjson'
+        providers['fast-orjson'] = FastJSONProvider(app)
+    else:
+        print('orjson not installed; skipping the C backend')
+
+    baseline = None
+    print(f'{args.rows} bookings, best of {args.repeat}')
+    for name, provider in providers.items():
+        if isinstance(provider, FastJSONProvider):
+            encode = lambda: provider.dumps_bytes(payload)
+        else:
+            encode = lambda: provider.dumps(payload, **compact).encode('utf-8')
+        size = len(encode())
+        seconds = best_of(encode, args.repeat)
+        baseline = baseline or seconds
+        print(f'{name:>14}: {seconds * 1000:8.1f} ms  {args.rows / seconds:10.0f} rows/s  '
+              f'{size / 1e6:6.2f} MB  x{baseline / seconds:.1f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Measure password verification and /api/auth/login throughput per core.
+
+Usage: python -m benchmarks.bench_login [--logins 50] [--methods scrypt:32768:8:1 pbkdf2:sha256:600000]
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from config import Config
+
+PASSWORD = 'correct horse battery staple'
+
+class BenchConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    CACHE_TYPE = 'SimpleCache'
+
+def verify_rate(method, count, threads):
+    """Verifications per second over count checks spread across threads."""
+    password_hash = generate_password_hash(PASSWORD, method=method)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = list(executor.map(lambda _: check_password_hash(password_hash, PASSWORD), range(count)))
+    assert all(results)
+    return count / (time.perf_counter() - start)
+
+def login_rate(method, count):
+    """End-to-end logins per second through the Flask test client on one thread."""
+    from app import create_app
+    from app.extensions import db
+    from app.models import User
+
+    BenchConfig.PASSWORD_HASH_METHOD = method
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.session.add(User(name='Bench', email='bench@fixrify.com', password=PASSWORD, role='customer'))
+        db.session.commit()
+
+    client = app.test_client()
+    body = {'email': 'bench@fixrify.com', 'password': PASSWORD}
+    assert client.post('/api/auth/login', json=body).status_code == 200
+
+    start = time.perf_counter()
+    for _ in range(count):
+        client.post('/api/auth/login', json=body)
+    return count / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--logins', type=int, default=50)
+    parser.add_argument('--methods', nargs='+', default=[
+        Config.PASSWORD_HASH_METHOD, 'scrypt:16384:8:1', 'pbkdf2:sha256:600000', 'pbkdf2:sha256:260000'
+    ])
+    args = parser.parse_args()
+    cores = os.cpu_count() or 1
+
+    print(f'{args.logins} logins per run, {cores} cores')
+    print(f'{"method":>22}  {"verify/s/core":>13}  {"verify/s all":>12}  {"login/s/core":>12}')
+    for method in args.methods:
+        single = verify_rate(method, args.logins, 1)
+        parallel = verify_rate(method, args.logins * cores, cores)
+        logins = login_rate(method, args.logins)
+        print(f'{method:>22}  {single:13.1f}  {parallel:12.1f}  {logins:12.1f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,272 @@
+"""Generate a deterministic synthetic dataset for load and benchmark runs.
+
+Usage: python -m benchmarks.dataset [--customers 10000] [--professionals 1000]
+           [--requests 100000] [--seed 42] [--reset]
+
+Rows are written with bulk Core inserts in chunks, so ORM write hooks do not
+run; professional_services, the dashboard counters and the professional
+rating/total_jobs aggregates are rebuilt with set-based SQL at the end. Every
+user shares one precomputed password hash (--password). The same seed and
+arguments always produce the same rows.
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+
+from app import create_app
+from app.extensions import db
+from app.models import Review, Service, ServiceRequest, User
+from app.models.counter import reconcile_counters
+from app.models.user import professional_services
+from app.utils.passwords import hash_password
+
+# Same catalog as manage.py
+SERVICES = [
+    ('Plumbing', 'Home Improvement', 100.0),
+    ('Electrical', 'Home Improvement', 150.0),
+    ('Cleaning', 'Housekeeping', 50.0),
+    ('Carpentry', 'Furniture', 120.0),
+    ('Painting', 'Home Improvement', 80.0),
+    ('Gardening', 'Outdoor', 60.0),
+    ('AC Repair', 'Electrical', 200.0),
+    ('Roofing', 'Construction', 300.0),
+    ('Locksmith', 'Security', 90.0),
+    ('Pest Control', 'Housekeeping', 70.0),
+]
+
+STREETS = ['Main Street', 'Oak Avenue', 'Park Road', 'Lake View', 'Hill Lane', 'Station Road', 'Market Street']
+CITIES = ['Springfield', 'Riverside', 'Fairview', 'Greenville', 'Madison', 'Georgetown']
+NOTES = [None, 'Please call before arriving.', 'Gate code 1234.', 'Available after 5pm.', 'Urgent, water leaking.']
+COMMENTS = [None, 'Great work!', 'On time and tidy.', 'Average experience.', 'Would hire again.', 'Took longer than expected.']
+
+def distribution(text):
+    """Parse 'a=0.5,b=0.3,c=0.2' into ([a, b, c], [0.5, 0.3, 0.2]); values that look like ints become ints."""
+    values, weights = [], []
+    for part in text.split(','):
+        value, _, weight = part.partition('=')
+        value = value.strip()
+        values.append(int(value) if value.lstrip('-').isdigit() else value)
+        weights.append(float(weight))
+    return values, weights
+
+class Progress:
+    """Print rows written and throughput per table at most once a second."""
+
+    def __init__(self, label, total=None):
+        self.label, self.total = label, total
+        self.done = 0
+        self.started = self.reported = time.perf_counter()
+
+    def advance(self, rows, final=False):
+        self.done += rows
+        now = time.perf_counter()
+        if final or now - self.reported >= 1:
+            self.reported = now
+            total = f'/{self.total:,}' if self.total else ''
+            rate = self.done / max(now - self.started, 1e-9)
+            print(f'{self.label:>16}: {self.done:,}{total} rows  {rate:,.0f} rows/s', file=sys.stderr)
+
+class ChunkedInserter:
+    """Buffer rows for one table and write them with executemany every chunk_size rows.
+
+    parents are the inserters of tables this one has foreign keys to; their
+    buffered rows are written first, so a child chunk never lands before the
+    rows it references.
+    """
+
+    def __init__(self, table, chunk_size, progress, parents=()):
+        self.table, self.chunk_size, self.progress = table, chunk_size, progress
+        self.parents = parents
+        self.rows = []
+
+    def add(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= self.chunk_size:
+            self.flush()
+
+    def flush(self, final=False):
+        written = len(self.rows)
+        if self.rows:
+            for parent in self.parents:
+                parent.flush()
+            db.session.execute(self.table.insert(), self.rows)
+            db.session.commit()
+            self.rows = []
+        self.progress.advance(written, final=final)
+
+def next_id(table):
+    return (db.session.execute(select(func.max(table.c.id))).scalar() or 0) + 1
+
+def generate_users(args, rng, password_hash, epoch):
+    table = User.__table__
+    first_id = next_id(table)
+    total = 1 + args.customers + args.professionals
+    inserter = ChunkedInserter(table, args.chunk_size, Progress('users', total))
+    offered, offered_weights = distribution(args.services_per_professional)
+    service_names = [name for name, _, _ in SERVICES]
+    pro_services = ChunkedInserter(
+        professional_services, args.chunk_size, Progress('pro services'), parents=(inserter,)
+    )
+
+    for offset in range(total):
+        user_id = first_id + offset
+        if offset == 0:
+            role, email, name = 'admin', f'admin{user_id}@fixrify.com', 'Admin User'
+        elif offset <= args.customers:
+            role, email, name = 'customer', f'customer{user_id}@fixrify.com', f'Customer {user_id}'
+        else:
+            role, email, name = 'professional', f'professional{user_id}@fixrify.com', f'Professional {user_id}'
+
+        created_at = epoch + timedelta(seconds=rng.randrange(args.days * 86400))
+        row = {
+            'id': user_id, 'name': name, 'email': email, 'password_hash': password_hash,
+            'phone': f'9{user_id:09d}', 'role': role, 'is_active': True, 'is_approved': True,
+            'created_at': created_at, 'updated_at': created_at, 'last_login': None, 'login_count': 0,
+            'services': None, 'experience': None, 'about': None, 'average_rating': 0.0, 'total_jobs': 0,
+            'token_version': 0,
+        }
+        if role == 'professional':
+            count = rng.choices(offered, offered_weights)[0]
+            services = rng.sample(service_names, min(count, len(service_names)))
+            experience = rng.randint(0, 20)
+            row.update({
+                'services': services,
+                'experience': experience,
+                'about': f'{experience} years of experience',
+                'is_approved': rng.random() >= args.unapproved_ratio,
+            })
+            for service_name in services:
+                pro_services.add({'user_id': user_id, 'service_name': service_name})
+        inserter.add(row)
+
+    inserter.flush(final=True)
+    pro_services.flush(final=True)
+
+    customers = (first_id + 1, first_id + args.customers)
+    professionals = (first_id + args.customers + 1, first_id + total - 1)
+    return customers, professionals
+
+def generate_services(epoch):
+    table = Service.__table__
+    first_id = next_id(table)
+    rows = [{
+        'id': first_id + i, 'name': name, 'category': category, 'description': f'{name} services',
+        'base_price': price, 'image_url': None, 'is_active': True, 'created_at': epoch, 'updated_at': epoch,
+    } for i, (name, category, price) in enumerate(SERVICES)]
+    db.session.execute(table.insert(), rows)
+    db.session.commit()
+    return [(row['id'], row['base_price']) for row in rows]
+
+def generate_requests(args, rng, epoch, customers, professionals, services):
+    requests = ChunkedInserter(ServiceRequest.__table__, args.chunk_size, Progress('service requests', args.requests))
+    reviews = ChunkedInserter(Review.__table__, args.chunk_size, Progress('reviews'), parents=(requests,))
+    statuses, status_weights = distribution(args.status_mix)
+    review_counts, review_weights = distribution(args.reviews_per_request)
+    ratings, rating_weights = distribution(args.ratings)
+    first_id = next_id(ServiceRequest.__table__)
+    review_id = next_id(Review.__table__)
+
+    for offset in range(args.requests):
+        request_id = first_id + offset
+        status = rng.choices(statuses, status_weights)[0]
+        service_id, base_price = rng.choice(services)
+        customer_id = rng.randint(*customers)
+        professional_id = rng.randint(*professionals) if professionals[0] <= professionals[1] else None
+        if status == 'pending' and rng.random() < 0.5:
+            professional_id = None
+        if status != 'pending' and professional_id is None:
+            status = 'pending'
+
+        created_at = epoch + timedelta(seconds=rng.randrange(args.days * 86400))
+        preferred_date = created_at + timedelta(days=rng.randint(1, 14))
+        completed_at = preferred_date + timedelta(hours=rng.randint(1, 72)) if status == 'completed' else None
+        updated_at = completed_at or created_at
+        requests.add({
+            'id': request_id, 'customer_id': customer_id, 'service_id': service_id,
+            'professional_id': professional_id, 'status': status,
+            'address': f'{rng.randint(1, 9999)} {rng.choice(STREETS)}, {rng.choice(CITIES)}',
+            'preferred_date': preferred_date, 'notes': rng.choice(NOTES),
+            'final_price': round(base_price + rng.uniform(0, 100), 2),
+            'created_at': created_at, 'updated_at': updated_at, 'completed_at': completed_at,
+        })
+
+        # Only completed jobs get reviewed
+        if status != 'completed':
+            continue
+        for _ in range(rng.choices(review_counts, review_weights)[0]):
+            reviewed_at = completed_at + timedelta(hours=rng.randint(1, 240))
+            reviews.add({
+                'id': review_id, 'user_id': customer_id, 'professional_id': professional_id,
+                'service_request_id': request_id, 'rating': rng.choices(ratings, rating_weights)[0],
+                'comment': rng.choice(COMMENTS), 'created_at': reviewed_at, 'updated_at': reviewed_at,
+            })
+            review_id += 1
+
+    requests.flush(final=True)
+    reviews.flush(final=True)
+
+def rebuild_aggregates():
+    """Recompute what the ORM write hooks would have maintained."""
+    users = User.__table__
+    average = select(func.avg(Review.rating)).where(Review.professional_id == users.c.id).scalar_subquery()
+    completed = select(func.count(ServiceRequest.id)).where(
+        ServiceRequest.professional_id == users.c.id, ServiceRequest.status == 'completed'
+    ).scalar_subquery()
+    db.session.execute(
+        users.update().where(users.c.role == 'professional').values(
+            average_rating=func.coalesce(average, 0.0), total_jobs=completed
+        )
+    )
+    db.session.commit()
+    reconcile_counters()
+
+    # Explicit ids leave PostgreSQL sequences behind
+    if db.engine.dialect.name == 'postgresql':
+        for table in ('users', 'services', 'service_requests', 'reviews'):
+            db.session.execute(db.text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT COALESCE(MAX(id), 1) FROM {table}))"
+            ))
+        db.session.commit()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--customers', type=int, default=10000)
+    parser.add_argument('--professionals', type=int, default=1000)
+    parser.add_argument('--requests', type=int, default=100000)
+    parser.add_argument('--status-mix', default='pending=0.25,accepted=0.2,completed=0.45,cancelled=0.1')
+    parser.add_argument('--reviews-per-request', default='0=0.3,1=0.65,2=0.05',
+                        help='number of reviews per completed request')
+    parser.add_argument('--ratings', default='1=0.05,2=0.05,3=0.15,4=0.35,5=0.4')
+    parser.add_argument('--services-per-professional', default='1=0.5,2=0.3,3=0.2')
+    parser.add_argument('--unapproved-ratio', type=float, default=0.05)
+    parser.add_argument('--days', type=int, default=365, help='spread created_at over this many days')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--chunk-size', type=int, default=10000)
+    parser.add_argument('--password', default='password')
+    parser.add_argument('--reset', action='store_true', help='drop and recreate all tables first')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    epoch = datetime(2024, 1, 1)
+    app = create_app()
+    with app.app_context():
+        if args.reset:
+            db.drop_all()
+            db.create_all()
+        elif db.session.execute(select(func.count()).select_from(User.__table__)).scalar():
+            parser.error('the database already has users; pass --reset to replace them')
+
+        started = time.perf_counter()
+        password_hash = hash_password(args.password)
+        customers, professionals = generate_users(args, rng, password_hash, epoch)
+        services = generate_services(epoch)
+        generate_requests(args, rng, epoch, customers, professionals, services)
+        rebuild_aggregates()
+        print(f'done in {time.perf_counter() - started:.1f}s', file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
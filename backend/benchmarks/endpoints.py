@@ -0,0 +1,249 @@
+"""Benchmark the API in-process through the Flask test client.
+
+Usage:
+    python -m benchmarks.endpoints run [--database-url URL] [--iterations 20] [--output results.json]
+    python -m benchmarks.endpoints compare BASE.json HEAD.json [--threshold 0.2]
+
+Point run at a database filled by benchmarks.dataset. Each endpoint is
+timed over --iterations requests after --warmup untimed ones, recording
+latency percentiles, the number of SQL statements and, in a separate
+request traced with tracemalloc, the peak Python memory. compare prints
+the differences and exits 1 when a median latency grows by more than
+--threshold or an endpoint issues more queries than before.
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+from sqlalchemy import event, func, select
+from sqlalchemy.engine import Engine
+
+from config import Config
+
+# name: (method, path, role or None, json body)
+ENDPOINTS = {
+    'login': ('POST', '/api/auth/login', None, 'login'),
+    'admin_dashboard': ('GET', '/api/admin/dashboard', 'admin', None),
+    'admin_bookings_page': ('GET', '/api/admin/bookings?limit=50', 'admin', None),
+    'admin_users_page': ('GET', '/api/admin/users?limit=50', 'admin', None),
+    'customer_dashboard': ('GET', '/api/customer/dashboard', 'customer', None),
+    'customer_requests': ('GET', '/api/customer/requests', 'customer', None),
+    'customer_professionals': ('GET', '/api/customer/professionals/{service_id}', 'customer', None),
+    'professional_dashboard': ('GET', '/api/professional/dashboard', 'professional', None),
+    'professional_requests': ('GET', '/api/professional/requests?status=completed', 'professional', None),
+    'services_catalog': ('GET', '/api/services/', None, None),
+    'customer_requests_page': ('GET', '/api/customer/requests?limit=50', 'customer', None),
+}
+
+class BenchConfig(Config):
+    # A failing view is reported with its status code rather than aborting the run
+    PROPAGATE_EXCEPTIONS = False
+    # Dashboards are measured uncached unless --cache simple is given
+    CACHE_TYPE = 'NullCache'
+
+class QueryCounter:
+    """Count SQL statements sent by any engine while active."""
+
+    def __init__(self):
+        self.count = 0
+
+    def _count(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        self.count = 0
+        event.listen(Engine, 'before_cursor_execute', self._count)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(Engine, 'before_cursor_execute', self._count)
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(0, math.ceil(q / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def pick_principals(password):
+    """One user per role plus a service id, chosen deterministically from the dataset."""
+    from app.auth.tokens import issue_tokens
+    from app.extensions import db
+    from app.models import Service, ServiceRequest, User
+
+    principals = {}
+    for role in ('admin', 'customer', 'professional'):
+        column = ServiceRequest.customer_id if role == 'customer' else ServiceRequest.professional_id
+        # The user with the most requests is the worst case the dashboards see
+        user_id = db.session.execute(
+            select(column).where(column.isnot(None)).group_by(column)
+            .order_by(func.count().desc(), column).limit(1)
+        ).scalar() if role != 'admin' else None
+        user = db.session.get(User, user_id) if user_id else User.query.filter_by(role=role).order_by(User.id).first()
+        if user is None:
+            sys.exit(f'no {role} in the database; generate one with python -m benchmarks.dataset')
+        principals[role] = {'Authorization': f'Bearer {issue_tokens(user)[0]}'}
+        principals[f'{role}_email'] = user.email
+
+    service = Service.query.order_by(Service.id).first()
+    bodies = {'login': {'email': principals['customer_email'], 'password': password}}
+    return principals, bodies, {'service_id': service.id if service else 1}
+
+def dataset_size():
+    from app.extensions import db
+    from app.models import Review, Service, ServiceRequest, User
+    return {
+        model.__tablename__: db.session.execute(select(func.count()).select_from(model)).scalar()
+        for model in (User, Service, ServiceRequest, Review)
+    }
+
+def measure(client, method, path, headers, body, warmup, iterations):
+    def call():
+        response = client.open(path, method=method, headers=headers, json=body)
+        # Streamed bodies are produced while they are read
+        data = response.get_data()
+        return response.status_code, len(data)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(warmup):
+            call()
+
+        timings, queries = [], []
+        for _ in range(iterations):
+            with QueryCounter() as counter:
+                start = time.perf_counter()
+                status, size = call()
+                timings.append((time.perf_counter() - start) * 1000)
+            queries.append(counter.count)
+
+        tracemalloc.start()
+        call()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    timings.sort()
+    return {
+        'status': status,
+        'bytes': size,
+        'queries': max(queries),
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p90_ms': round(percentile(timings, 90), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'mean_ms': round(sum(timings) / len(timings), 3),
+        'max_ms': round(timings[-1], 3),
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+def run(args):
+    from app import create_app
+
+    if args.database_url:
+        BenchConfig.SQLALCHEMY_DATABASE_URI = args.database_url
+    if args.cache == 'simple':
+        BenchConfig.CACHE_TYPE = 'SimpleCache'
+    app = create_app(BenchConfig)
+    logging.getLogger().setLevel(logging.WARNING)
+
+    selected = args.endpoints or list(ENDPOINTS)
+    results = {}
+    with app.app_context():
+        principals, bodies, params = pick_principals(args.password)
+        size = dataset_size()
+
+    client = app.test_client()
+    for name in selected:
+        method, path, role, body = ENDPOINTS[name]
+        results[name] = measure(
+            client, method, path.format(**params), principals.get(role), bodies.get(body),
+            args.warmup, args.iterations
+        )
+        result = results[name]
+        print(f'{name:>24}  {result["status"]}  p50 {result["p50_ms"]:9.2f} ms  p90 {result["p90_ms"]:9.2f} ms  '
+              f'{result["queries"]:4d} queries  {result["peak_kb"]:10.1f} KiB', file=sys.stderr)
+
+    report = {
+        'meta': {
+            'revision': git_revision(),
+            'date': datetime.utcnow().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'database': app.config['SQLALCHEMY_DATABASE_URI'].split(':', 1)[0],
+            'cache': args.cache,
+            'iterations': args.iterations,
+            'rows': size,
+        },
+        'endpoints': results,
+    }
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+def compare(args):
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.head) as f:
+        head = json.load(f)
+
+    regressions = []
+    print(f'{"endpoint":>24}  {"p50 base":>9}  {"p50 head":>9}  {"change":>7}  {"queries":>9}  {"peak KiB":>17}')
+    for name in sorted(set(base['endpoints']) | set(head['endpoints'])):
+        old, new = base['endpoints'].get(name), head['endpoints'].get(name)
+        if not old or not new:
+            print(f'{name:>24}  only in {"head" if new else "base"}')
+            continue
+        change = (new['p50_ms'] - old['p50_ms']) / old['p50_ms'] if old['p50_ms'] else 0.0
+        print(f'{name:>24}  {old["p50_ms"]:9.2f}  {new["p50_ms"]:9.2f}  {change:+7.0%}  '
+              f'{old["queries"]:>4}->{new["queries"]:<4}  {old["peak_kb"]:>8.0f}->{new["peak_kb"]:<8.0f}')
+        if change > args.threshold or new['queries'] > old['queries']:
+            regressions.append(name)
+
+    if regressions:
+        print(f'regressed: {", ".join(regressions)}', file=sys.stderr)
+        return 1
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='benchmark the endpoints and write JSON results')
+    run_parser.add_argument('--database-url', default=os.environ.get('DATABASE_URL'))
+    run_parser.add_argument('--iterations', type=int, default=20)
+    run_parser.add_argument('--warmup', type=int, default=3)
+    run_parser.add_argument('--cache', choices=('null', 'simple'), default='null')
+    run_parser.add_argument('--password', default='password', help='password the dataset was generated with')
+    run_parser.add_argument('--endpoints', nargs='+', choices=sorted(ENDPOINTS))
+    run_parser.add_argument('--output')
+
+    compare_parser = commands.add_parser('compare', help='diff two result files')
+    compare_parser.add_argument('base')
+    compare_parser.add_argument('head')
+    compare_parser.add_argument('--threshold', type=float, default=0.2,
+                                help='allowed relative growth of the median latency')
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        run(args)
+    else:
+        sys.exit(compare(args))
+
+if __name__ == '__main__':
+    main()
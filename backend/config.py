@@ -9,10 +9,30 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///app.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # JSON encoding: 'auto' uses orjson when installed, 'stdlib' forces the json module
+    JSON_BACKEND = os.environ.get('JSON_BACKEND') or 'auto'
+
+    # Rows fetched and encoded per chunk by streamed list responses
+    STREAM_BATCH_SIZE = 500
+
+    # Keyset pagination (?limit= / ?cursor=) on list endpoints
+    PAGE_SIZE_DEFAULT = 50
+    PAGE_SIZE_MAX = 500
+
     # JWT
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-secret-key'
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
+    # How long a user's token_version stays cached; writes overwrite it on commit
+    TOKEN_VERSION_CACHE_TIMEOUT = 3600
+
+    # Password hashing; existing hashes made with other parameters are upgraded on login
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD') or 'scrypt:32768:8:1'
+    PASSWORD_SALT_LENGTH = int(os.environ.get('PASSWORD_SALT_LENGTH') or 16)
+    # Verify on a bounded thread pool instead of the request thread (0 disables);
+    # logins beyond workers + queue get a 503
+    PASSWORD_VERIFY_WORKERS = int(os.environ.get('PASSWORD_VERIFY_WORKERS') or 0)
+    PASSWORD_VERIFY_QUEUE = int(os.environ.get('PASSWORD_VERIFY_QUEUE') or 16)
     
     # Admin
     ADMIN_EMAIL = os.environ.get('ADMIN_EMAIL') or 'admin@fixrify.com'
@@ -23,13 +43,39 @@ class Config:
     CORS_METHODS = ['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS', 'PATCH']
     CORS_ALLOW_HEADERS = ['Content-Type', 'Authorization', 'Access-Control-Allow-Credentials']
     CORS_SUPPORTS_CREDENTIALS = True
-    CORS_EXPOSE_HEADERS = ['Content-Range', 'X-Content-Range']
+    CORS_EXPOSE_HEADERS = ['Content-Range', 'X-Content-Range', 'Link', 'X-Next-Cursor', 'X-Total-Count', 'X-Total-Count-Estimated', 'X-Request-ID']
+
+    # Logging goes through a background queue; LOG_FORMAT is 'text' or 'json'
+    LOG_LEVEL = os.environ.get('LOG_LEVEL') or 'INFO'
+    LOG_FORMAT = os.environ.get('LOG_FORMAT') or 'text'
+    LOG_QUEUE_SIZE = 10000
+    # Share of requests whose debug records are kept when LOG_LEVEL is DEBUG
+    LOG_DEBUG_SAMPLE_RATE = float(os.environ.get('LOG_DEBUG_SAMPLE_RATE') or 1.0)
+
+    # Per-request SQL stats (Server-Timing header and log line)
+    SQL_INSTRUMENTATION = True
+    # Statement shapes repeated this often in one request are logged as N+1 candidates
+    SQL_N_PLUS_ONE_THRESHOLD = 10
+    # Max statements per endpoint; exceeding raises under debug/testing and logs otherwise
+    SQL_QUERY_BUDGET_DEFAULT = None
+    SQL_QUERY_BUDGETS = {
+        'auth.login': 3,
+        'admin.get_dashboard': 4,
+        'customer.get_dashboard': 20,
+        'professional.get_dashboard': 25,
+    }
+
+    # Prometheus metrics; under gunicorn set PROMETHEUS_MULTIPROC_DIR (see gunicorn.conf.py)
+    METRICS_ENABLED = True
+    METRICS_PATH = '/metrics'
 
     # Redis settings
     CACHE_TYPE = 'RedisCache'
     CACHE_REDIS_HOST = 'localhost'
     CACHE_REDIS_PORT = 6379
     CACHE_DEFAULT_TIMEOUT = 300
+    # Upper bound only: dashboard entries are invalidated by write hooks before this
+    DASHBOARD_CACHE_TIMEOUT = 3600
 
     # Celery settings
     CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL') or 'redis://172.17.0.1:6379/0'
@@ -39,6 +85,20 @@ class Config:
     MAIL_SERVER = 'localhost'
     MAIL_PORT = 1025
     MAIL_DEFAULT_SENDER = 'noreply@fixrify.com'
+    # Flask-Mail reconnects after this many messages on one connection
+    MAIL_MAX_EMAILS = 100
+    # Messages per second for the dispatcher and for each send_messages() call (0 = unlimited)
+    MAIL_RATE_LIMIT = 10
+    MAIL_MAX_RETRIES = 3
+    MAIL_RETRY_BACKOFF = 1.0
+    # Background dispatcher used by send_email()
+    MAIL_DISPATCH_WORKERS = 2
+    MAIL_QUEUE_SIZE = 1000
+    MAIL_IDLE_TIMEOUT = 5
+    # Professionals per send_reminder_chunk subtask of the daily reminder run
+    REMINDER_CHUNK_SIZE = 500
+    # Customers per send_report_chunk subtask of the monthly report run
+    MONTHLY_REPORT_CHUNK_SIZE = 500
     # MAIL_USE_TLS = os.environ.get('MAIL_USE_TLS') is not None
     # MAIL_USE_SSL = os.environ.get('MAIL_USE_SSL') is not None
     # MAIL_USERNAME = os.environ.get('MAIL_USERNAME')
@@ -46,6 +106,25 @@ class Config:
 
     # File upload settings
     UPLOAD_FOLDER = 'uploads'
+
+    # Export files; web and worker processes must see the same directory
+    EXPORT_FOLDER = os.environ.get('EXPORT_FOLDER') or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), 'instance', 'exports'
+    )
+    # Rows fetched per round trip while writing an export
+    EXPORT_BATCH_SIZE = 1000
+    # Rows per export_partition subtask; partitions run in parallel across workers
+    EXPORT_PARTITION_ROWS = 250000
+    # Seconds an export file is kept before cleanup_exports deletes it
+    EXPORT_MAX_AGE = 24 * 3600
+    # Incremental exports leave rows changed in the last EXPORT_WATERMARK_LAG seconds
+    # for the next run, and take a full snapshot every EXPORT_FULL_SNAPSHOT_DAYS (0 = never)
+    EXPORT_WATERMARK_LAG = 60
+    EXPORT_FULL_SNAPSHOT_DAYS = 7
+    # Identical export requests share one job while it runs (for at most
+    # EXPORT_LOCK_TIMEOUT seconds) and for EXPORT_DEDUP_WINDOW seconds after it finishes
+    EXPORT_LOCK_TIMEOUT = 2 * 3600
+    EXPORT_DEDUP_WINDOW = 300
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'pdf', 'doc', 'docx'}
 
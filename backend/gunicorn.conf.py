@@ -0,0 +1,20 @@
+"""Gunicorn settings: gunicorn -c gunicorn.conf.py wsgi:app"""
+import os
+import shutil
+
+from prometheus_client import multiprocess
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('GUNICORN_WORKERS', 4))
+
+# Workers share metrics through files in this directory; it must be set before the app is imported
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/fixrify-prometheus')
+
+def on_starting(server):
+    # Series left over from a previous run would otherwise be summed into the new one
+    path = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+
+def child_exit(server, worker):
+    multiprocess.mark_process_dead(worker.pid)
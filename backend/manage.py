@@ -127,6 +127,12 @@ def add_mock_data():
 
         db.session.commit()
 
+        # Ratings are stored aggregates, so refresh them once the reviews exist
+        for professional in professionals:
+            professional.update_rating()
+
+        db.session.commit()
+
         print("Mock data added successfully!")
 
 if __name__ == "__main__":
@@ -0,0 +1,40 @@
+"""Add indexes for the hot dashboard and listing queries
+
+Revision ID: 6f1c2a9d4b10
+Revises: 
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '6f1c2a9d4b10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_service_requests_customer_status_created', 'service_requests', ['customer_id', 'status', 'created_at']),
+    ('ix_service_requests_professional_status_created', 'service_requests', ['professional_id', 'status', 'created_at']),
+    ('ix_service_requests_status_created', 'service_requests', ['status', 'created_at']),
+    ('ix_service_requests_created_id', 'service_requests', ['created_at', 'id']),
+    ('ix_service_requests_service_id', 'service_requests', ['service_id']),
+    ('ix_reviews_professional_id', 'reviews', ['professional_id']),
+    ('ix_reviews_service_request_id', 'reviews', ['service_request_id']),
+    ('ix_reviews_user_id', 'reviews', ['user_id']),
+    ('ix_users_role_approved_active', 'users', ['role', 'is_approved', 'is_active']),
+    ('ix_users_created_id', 'users', ['created_at', 'id']),
+]
+
+
+def upgrade():
+    # create_app() runs db.create_all(), which may already have built these
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False, if_not_exists=True)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,65 @@
+"""Add the professional_services index and backfill it from users.services
+
+Revision ID: a3d7e5c81f02
+Revises: 6f1c2a9d4b10
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3d7e5c81f02'
+down_revision = '6f1c2a9d4b10'
+branch_labels = None
+depends_on = None
+
+
+users = sa.table(
+    'users',
+    sa.column('id', sa.Integer),
+    sa.column('role', sa.String),
+    sa.column('services', sa.JSON)
+)
+
+professional_services = sa.table(
+    'professional_services',
+    sa.column('user_id', sa.Integer),
+    sa.column('service_name', sa.String)
+)
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    # create_app() runs db.create_all(), which may already have created the table
+    if not sa.inspect(bind).has_table('professional_services'):
+        op.create_table(
+            'professional_services',
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('service_name', sa.String(length=100), nullable=False),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('user_id', 'service_name')
+        )
+        op.create_index('ix_professional_services_service_name', 'professional_services',
+                        ['service_name', 'user_id'], unique=False)
+
+    # Backfill from the JSON column, mirroring User.offered_service_names()
+    bind.execute(professional_services.delete())
+    rows = []
+    for user_id, services in bind.execute(
+        sa.select(users.c.id, users.c.services).where(users.c.role == 'professional')
+    ):
+        if isinstance(services, str):
+            services = [services]
+        for name in dict.fromkeys(services or []):
+            if isinstance(name, str):
+                rows.append({'user_id': user_id, 'service_name': name})
+    if rows:
+        bind.execute(professional_services.insert(), rows)
+
+
+def downgrade():
+    op.drop_index('ix_professional_services_service_name', table_name='professional_services')
+    op.drop_table('professional_services')
@@ -0,0 +1,41 @@
+"""Add export_watermarks and the updated_at index behind incremental exports
+
+Revision ID: b7e2f4a19c63
+Revises: e4a8c2d95b17
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e2f4a19c63'
+down_revision = 'e4a8c2d95b17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    # create_app() runs db.create_all(), which may already have created both
+    if not sa.inspect(bind).has_table('export_watermarks'):
+        op.create_table(
+            'export_watermarks',
+            sa.Column('consumer', sa.String(length=100), nullable=False),
+            sa.Column('watermark', sa.DateTime(), nullable=True),
+            sa.Column('last_full_at', sa.DateTime(), nullable=True),
+            sa.Column('last_export_id', sa.String(length=64), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('consumer')
+        )
+    op.create_index(
+        'ix_service_requests_updated_id', 'service_requests', ['updated_at', 'id'],
+        unique=False, if_not_exists=True
+    )
+
+
+def downgrade():
+    op.drop_index('ix_service_requests_updated_id', table_name='service_requests', if_exists=True)
+    op.drop_table('export_watermarks')
@@ -0,0 +1,53 @@
+"""Add the counters table behind the admin dashboard and seed it
+
+Revision ID: c91b4f27d6e3
+Revises: a3d7e5c81f02
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c91b4f27d6e3'
+down_revision = 'a3d7e5c81f02'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    # create_app() runs db.create_all(), which may already have created the table
+    if not sa.inspect(bind).has_table('counters'):
+        op.create_table(
+            'counters',
+            sa.Column('name', sa.String(length=64), nullable=False),
+            sa.Column('value', sa.BigInteger(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('name')
+        )
+
+    # Seed with the same values reconcile_counters() computes
+    op.execute('DELETE FROM counters')
+    op.execute(
+        "INSERT INTO counters (name, value, updated_at) "
+        "SELECT 'users', COUNT(*), CURRENT_TIMESTAMP FROM users "
+        "UNION ALL SELECT 'services', COUNT(*), CURRENT_TIMESTAMP FROM services "
+        "UNION ALL SELECT 'service_requests', COUNT(*), CURRENT_TIMESTAMP FROM service_requests"
+    )
+    op.execute(
+        "INSERT INTO counters (name, value, updated_at) "
+        "SELECT 'users:role:' || role, COUNT(*), CURRENT_TIMESTAMP FROM users "
+        "WHERE role IS NOT NULL GROUP BY role"
+    )
+    op.execute(
+        "INSERT INTO counters (name, value, updated_at) "
+        "SELECT 'service_requests:status:' || status, COUNT(*), CURRENT_TIMESTAMP FROM service_requests "
+        "WHERE status IS NOT NULL GROUP BY status"
+    )
+
+
+def downgrade():
+    op.drop_table('counters')
@@ -0,0 +1,33 @@
+"""Add users.token_version for revoking tokens when role or account state changes
+
+Revision ID: e4a8c2d95b17
+Revises: c91b4f27d6e3
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4a8c2d95b17'
+down_revision = 'c91b4f27d6e3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    # create_app() runs db.create_all(), which may already have created the column
+    columns = {column['name'] for column in sa.inspect(bind).get_columns('users')}
+    if 'token_version' not in columns:
+        op.add_column(
+            'users',
+            sa.Column('token_version', sa.Integer(), nullable=False, server_default='0')
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('token_version')
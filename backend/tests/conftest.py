@@ -0,0 +1,104 @@
+import os
+import socketserver
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from app.extensions import db
+from config import Config
+
+class TestConfig(Config):
+    TESTING = True
+    # Point TEST_DATABASE_URL at a scratch PostgreSQL database to run against Postgres
+    SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL') or 'sqlite://'
+    CACHE_TYPE = 'SimpleCache'
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def eager(monkeypatch):
+    """Run Celery tasks inline, keeping results in memory instead of Redis."""
+    from celery.backends.cache import CacheBackend
+    from app.tasks import celery
+    # Chords register their group result with the backend even in eager mode
+    monkeypatch.setattr(celery._local, 'backend', CacheBackend(app=celery, url='memory://'), raising=False)
+    celery.conf.task_always_eager = True
+    yield
+    celery.conf.task_always_eager = False
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    """Accept SMTP sessions on localhost and keep every message delivered."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), SMTPSession)
+        self.messages = []
+        self.connections = 0
+        # Reply 421 to this many DATA commands, then accept
+        self.fail_data = 0
+
+class SMTPSession(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply('220 sink ready')
+        recipients = []
+        for raw in self.rfile:
+            command = raw.decode().strip().upper()
+            if command.startswith(('EHLO', 'HELO')):
+                self.reply('250 sink')
+            elif command.startswith('MAIL FROM'):
+                recipients = []
+                self.reply('250 OK')
+            elif command.startswith('RCPT TO'):
+                recipients.append(raw.decode().split(':', 1)[1].strip(' <>\r\n'))
+                self.reply('250 OK')
+            elif command == 'DATA':
+                if self.server.fail_data:
+                    self.server.fail_data -= 1
+                    self.reply('421 try again later')
+                    return
+                self.reply('354 end with .')
+                for line in self.rfile:
+                    if line == b'.\r\n':
+                        break
+                self.server.messages.append(recipients)
+                self.reply('250 queued')
+            elif command == 'QUIT':
+                self.reply('221 bye')
+                return
+            else:
+                self.reply('250 OK')
+
+@pytest.fixture
+def sink(app):
+    server = SMTPSink()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    app.config.update(MAIL_RATE_LIMIT=0, MAIL_RETRY_BACKOFF=0.01)
+    # Flask-Mail copies its settings at init_app
+    app.extensions['mail'].server = '127.0.0.1'
+    app.extensions['mail'].port = server.server_address[1]
+    app.extensions['mail'].max_emails = 3
+    app.extensions['mail'].suppress = False
+    yield server
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,97 @@
+"""Check that cached dashboards are invalidated by the writes they depend on."""
+import re
+from datetime import datetime
+
+import pytest
+
+from app import create_app
+from app.auth.tokens import issue_tokens
+from app.extensions import db
+from app.models import Service, ServiceRequest, User
+from app.utils.cache_tags import tag_versions
+from conftest import TestConfig
+
+def bearer(token):
+    return {'Authorization': f'Bearer {token}'}
+
+class NullCacheConfig(TestConfig):
+    CACHE_TYPE = 'NullCache'
+
+def test_tag_versions_without_a_storing_cache():
+    app = create_app(NullCacheConfig)
+    with app.app_context():
+        versions = tag_versions(['users:all', 'user:1'])
+        assert all(isinstance(version, str) for version in versions)
+        # Nothing was stored, so the next request can't reuse an entry
+        assert tag_versions(['users:all']) != versions[:1]
+
+        customer = User(name='Customer', email='customer@example.com', password='pw', role='customer')
+        db.session.add(customer)
+        db.session.commit()
+        headers = bearer(issue_tokens(customer)[0])
+
+    client = app.test_client()
+    assert client.get('/api/customer/dashboard', headers=headers).status_code == 200
+    assert client.get('/api/customer/dashboard', headers=headers).status_code == 200
+    with app.app_context():
+        db.drop_all()
+
+@pytest.fixture
+def users(app):
+    with app.app_context():
+        admin = User(name='Admin', email='admin@example.com', password='pw', role='admin')
+        customer = User(name='Customer', email='customer@example.com', password='pw', role='customer')
+        pro = User(name='Pro', email='pro@example.com', password='pw', role='professional')
+        stranger = User(name='Stranger', email='stranger@example.com', password='pw', role='professional')
+        service = Service(name='Plumbing', category='home', base_price=50)
+        db.session.add_all([admin, customer, pro, stranger, service])
+        db.session.flush()
+        db.session.add(ServiceRequest(customer_id=customer.id, service_id=service.id, professional_id=pro.id,
+                                      status='accepted', address='1 Main St', preferred_date=datetime(2024, 1, 1)))
+        db.session.commit()
+        # Returned outside the context: requests must each get their own app context and g
+        return {
+            'admin': bearer(issue_tokens(admin)[0]),
+            'customer': bearer(issue_tokens(customer)[0]),
+            'pro': bearer(issue_tokens(pro)[0]),
+            'ids': {user.email.split('@')[0]: user.id for user in (admin, customer, pro, stranger)},
+        }
+
+def query_count(response):
+    """SQL statements the request issued, from its Server-Timing header."""
+    return int(re.search(r'desc="(\d+) queries"', response.headers['Server-Timing']).group(1))
+
+def test_unrelated_user_writes_keep_dashboards(app, client, users):
+    ids = users['ids']
+    for role, path in (('customer', '/api/customer/dashboard'), ('pro', '/api/professional/dashboard')):
+        assert query_count(client.get(path, headers=users[role])) > 0
+
+    with app.app_context():
+        db.session.get(User, ids['admin']).update_login_info()
+        stranger = db.session.get(User, ids['stranger'])
+        stranger.password = 'new password'
+        stranger.average_rating = 4.5
+        db.session.commit()
+
+    # Still served from cache without touching the database
+    for role, path in (('customer', '/api/customer/dashboard'), ('pro', '/api/professional/dashboard')):
+        assert query_count(client.get(path, headers=users[role])) == 0
+
+def test_counterpart_changes_invalidate_dashboards(app, client, users):
+    ids = users['ids']
+    dashboard = client.get('/api/customer/dashboard', headers=users['customer']).get_json()
+    assert dashboard['active_requests'][0]['professional']['name'] == 'Pro'
+    pro_dashboard = client.get('/api/professional/dashboard', headers=users['pro']).get_json()
+    assert pro_dashboard['active_requests'][0]['customer']['name'] == 'Customer'
+
+    response = client.put(f"/api/admin/users/{ids['pro']}", headers=users['admin'], json={'name': 'Renamed Pro'})
+    assert response.status_code == 200
+    response = client.put(f"/api/admin/users/{ids['customer']}", headers=users['admin'], json={'phone': '555'})
+    assert response.status_code == 200
+
+    dashboard = client.get('/api/customer/dashboard', headers=users['customer']).get_json()
+    assert dashboard['active_requests'][0]['professional']['name'] == 'Renamed Pro'
+    assert dashboard['profile']['phone'] == '555'
+    pro_dashboard = client.get('/api/professional/dashboard', headers=users['pro']).get_json()
+    assert pro_dashboard['profile']['name'] == 'Renamed Pro'
+    assert pro_dashboard['active_requests'][0]['customer']['phone'] == '555'
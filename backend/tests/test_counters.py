@@ -0,0 +1,80 @@
+"""Check that the dashboard counters track writes made through expired instances."""
+from datetime import datetime
+
+import pytest
+
+from app.extensions import db
+from app.models import Counter, Service, ServiceRequest, User
+from app.models.counter import count_rows, reconcile_counters
+
+def stored_counters():
+    return {name: value for name, value in db.session.query(Counter.name, Counter.value) if value}
+
+def expected_counters():
+    return {name: value for name, value in count_rows().items() if value}
+
+@pytest.fixture
+def rows(app):
+    with app.app_context():
+        customer = User(name='Customer', email='customer@example.com', password='pw', role='customer')
+        pro = User(name='Pro', email='pro@example.com', password='pw', role='professional')
+        service = Service(name='Plumbing', category='home', base_price=50)
+        db.session.add_all([customer, pro, service])
+        db.session.flush()
+        requests = [
+            ServiceRequest(customer_id=customer.id, service_id=service.id, professional_id=pro.id,
+                           address='1 Main St', preferred_date=datetime(2024, 1, 1))
+            for _ in range(4)
+        ]
+        db.session.add_all(requests)
+        # Every instance is expired by this commit, as in a task or a multi-step route
+        db.session.commit()
+        yield customer, pro, requests
+
+def test_status_changes_on_expired_instances(rows):
+    customer, pro, requests = rows
+    assert stored_counters() == expected_counters()
+
+    requests[0].status = 'completed'
+    db.session.commit()
+    requests[0].status = 'accepted'
+    db.session.commit()
+    requests[1].status = 'completed'
+    db.session.commit()
+    requests[1].complete()  # completed -> completed is not a change
+    requests[2].cancel()
+
+    assert stored_counters() == expected_counters()
+    assert stored_counters()['service_requests:status:pending'] == 1
+
+def test_role_change_and_delete_on_expired_instances(rows):
+    customer, pro, requests = rows
+
+    customer.role = 'professional'
+    db.session.commit()
+    for r in requests:
+        db.session.delete(r)
+    db.session.commit()
+    db.session.delete(pro)
+    db.session.commit()
+
+    assert stored_counters() == expected_counters()
+    assert stored_counters()['users:role:professional'] == 1
+
+def test_reconcile_upserts_and_zeroes_missing_counters(rows):
+    customer, pro, requests = rows
+    db.session.add(Counter(name='users:role:retired', value=3))
+    db.session.query(Counter).filter_by(name='users').update({'value': 99})
+    db.session.commit()
+
+    values = reconcile_counters()
+
+    assert values == count_rows()
+    assert stored_counters() == expected_counters()
+
+def test_values_does_not_write_before_seeding(rows):
+    db.session.query(Counter).delete()
+    db.session.commit()
+
+    assert Counter.values() == count_rows()
+    assert db.session.query(Counter).count() == 0
@@ -0,0 +1,35 @@
+"""Check email delivery against a local SMTP sink."""
+from app.utils.email import build_message, get_dispatcher, send_email, send_messages
+
+def test_send_messages_reuses_connections(app, sink):
+    with app.app_context():
+        messages = [build_message('Hi', f'user{i}@example.com', '<p>hi</p>') for i in range(7)]
+        assert send_messages(messages) == 7
+
+    assert sink.messages == [[f'user{i}@example.com'] for i in range(7)]
+    # MAIL_MAX_EMAILS=3: one connection per three messages
+    assert sink.connections == 3
+
+def test_transient_failures_are_retried(app, sink):
+    sink.fail_data = 2
+    with app.app_context():
+        assert send_messages([build_message('Hi', 'retry@example.com', '<p>hi</p>')]) == 1
+
+    assert sink.messages == [['retry@example.com']]
+
+def test_dispatcher_delivers_queued_email(app, sink):
+    with app.app_context():
+        for i in range(5):
+            send_email('Hi', f'queued{i}@example.com', '<p>hi</p>')
+        get_dispatcher().join()
+
+    assert sorted(sink.messages) == sorted([f'queued{i}@example.com'] for i in range(5))
+
+def test_a_bad_message_does_not_stop_the_batch(app, sink):
+    with app.app_context():
+        messages = [build_message('Hi', f'user{i}@example.com', '<p>hi</p>') for i in range(4)]
+        messages[1].subject = 'Injected\r\nBcc: victim@example.com'  # Flask-Mail raises BadHeaderError
+        messages[2].recipients = []  # Flask-Mail asserts there is a recipient
+        assert send_messages(messages) == 2
+
+    assert sink.messages == [['user0@example.com'], ['user3@example.com']]
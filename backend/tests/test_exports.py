@@ -0,0 +1,171 @@
+"""Check that exports are written to disk and downloaded with Range support."""
+import csv
+import gzip
+import io
+import json
+import os
+import time
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from app.extensions import db
+from app.models import ExportWatermark, Service, ServiceRequest, User
+from app.tasks import cleanup_exports, generate_service_requests_csv
+from app.utils.exports import complete_export_claim, export_fingerprint, find_export
+
+@pytest.fixture
+def admin_headers(app, tmp_path):
+    app.config['EXPORT_FOLDER'] = str(tmp_path)
+    with app.app_context():
+        admin = User(name='Admin', email='admin@example.com', password='pw', role='admin')
+        customer = User(name='Customer', email='customer@example.com', password='pw', role='customer')
+        pro = User(name='Pro', email='pro@example.com', password='pw', role='professional')
+        service = Service(name='Plumbing', category='home', base_price=50)
+        db.session.add_all([admin, customer, pro, service])
+        db.session.flush()
+        for i in range(25):
+            db.session.add(ServiceRequest(
+                customer_id=customer.id, service_id=service.id,
+                professional_id=pro.id if i % 2 else None, address=f'{i} Main St',
+                preferred_date=datetime(2024, 1, 1)
+            ))
+        db.session.commit()
+        token = create_access_token(identity=admin.id, additional_claims=admin.token_claims())
+    return {'Authorization': f'Bearer {token}'}
+
+def test_export_is_streamed_to_a_gzip_file(app, client, admin_headers, eager):
+    app.config.update(EXPORT_BATCH_SIZE=10, EXPORT_PARTITION_ROWS=7)
+    task_id = client.post('/api/admin/exports/service-requests', headers=admin_headers).get_json()['task_id']
+
+    response = client.get(f'/api/admin/exports/{task_id}', headers=admin_headers)
+    assert response.status_code == 200
+    rows = list(csv.reader(io.StringIO(gzip.decompress(response.data).decode())))
+    assert rows[0][:3] == ['ID', 'Customer', 'Service']
+    assert len(rows) == 26
+    assert rows[1][1:4] == ['Customer', 'Plumbing', 'Not Assigned']
+    assert rows[2][3] == 'Pro'
+    # four partitions joined back in id order
+    assert [int(row[0]) for row in rows[1:]] == sorted(int(row[0]) for row in rows[1:])
+    assert not [name for name in os.listdir(app.config['EXPORT_FOLDER']) if '.part' in name]
+
+    partial = client.get(f'/api/admin/exports/{task_id}', headers={**admin_headers, 'Range': 'bytes=10-'})
+    assert partial.status_code == 206
+    assert partial.headers['Content-Range'] == f'bytes 10-{len(response.data) - 1}/{len(response.data)}'
+    assert partial.data == response.data[10:]
+
+def test_ndjson_export_with_date_range(app, client, admin_headers, eager):
+    app.config['EXPORT_PARTITION_ROWS'] = 4
+    with app.app_context():
+        for r in ServiceRequest.query.all():
+            r.created_at = datetime(2024, 3, 1 + r.id % 5)
+        db.session.commit()
+
+    task_id = client.post('/api/admin/exports/service-requests', headers=admin_headers, json={
+        'export_format': 'ndjson', 'start_date': '2024-03-02', 'end_date': '2024-03-03'
+    }).get_json()['task_id']
+
+    response = client.get(f'/api/admin/exports/{task_id}', headers=admin_headers)
+    assert response.headers['Content-Disposition'].endswith('service_requests.ndjson.gz')
+    records = [json.loads(line) for line in gzip.decompress(response.data).splitlines()]
+    assert sorted(r['id'] for r in records) == [i for i in range(1, 26) if i % 5 in (1, 2)]
+    assert records[0]['customer'] == 'Customer' and records[0]['created_at'].startswith('2024-03-0')
+
+def export_ids(client, headers, body):
+    task_id = client.post('/api/admin/exports/service-requests', headers=headers, json=body).get_json()['task_id']
+    response = client.get(f'/api/admin/exports/{task_id}', headers=headers)
+    return task_id, [int(row[0]) for row in csv.reader(io.StringIO(gzip.decompress(response.data).decode()))
+                     if row[0] != 'ID']
+
+def test_incremental_export_follows_the_watermark(app, client, admin_headers, eager):
+    # Repeated identical requests would otherwise share one export
+    app.config.update(EXPORT_WATERMARK_LAG=0, EXPORT_DEDUP_WINDOW=0)
+    body = {'mode': 'incremental', 'consumer': 'bi'}
+
+    # The first run for a consumer is a full snapshot
+    _, ids = export_ids(client, admin_headers, body)
+    assert len(ids) == 25
+
+    with app.app_context():
+        for r in ServiceRequest.query.filter(ServiceRequest.id.in_([3, 7])):
+            r.status = 'accepted'
+        db.session.commit()
+    task_id, ids = export_ids(client, admin_headers, body)
+    assert ids == [3, 7]
+
+    state = client.get('/api/admin/exports/consumers/bi', headers=admin_headers).get_json()
+    assert state['last_export_id'] == task_id
+
+    _, ids = export_ids(client, admin_headers, body)
+    assert ids == []
+
+    # A snapshot older than EXPORT_FULL_SNAPSHOT_DAYS triggers a new one
+    with app.app_context():
+        db.session.get(ExportWatermark, 'bi').last_full_at = datetime(2020, 1, 1)
+        db.session.commit()
+    _, ids = export_ids(client, admin_headers, body)
+    assert len(ids) == 25
+
+def start_export(client, headers, body=None):
+    return client.post('/api/admin/exports/service-requests', headers=headers, json=body or {}).get_json()
+
+def test_running_export_is_shared(app, client, admin_headers):
+    # Not eager: the job stays queued, as if a worker were still on it
+    with patch.object(generate_service_requests_csv, 'delay') as delay:
+        first = start_export(client, admin_headers)
+        second = start_export(client, admin_headers)
+        other = start_export(client, admin_headers, {'export_format': 'ndjson'})
+
+    assert not first['deduplicated'] and second['deduplicated']
+    assert second['task_id'] == first['task_id'] != other['task_id']
+    assert delay.call_count == 2
+
+def test_finished_export_is_reused_within_the_window(app, client, admin_headers, eager):
+    first = start_export(client, admin_headers)
+    assert start_export(client, admin_headers)['task_id'] == first['task_id']
+
+    app.config['EXPORT_DEDUP_WINDOW'] = 0
+    with app.app_context():
+        complete_export_claim(export_fingerprint({'export_format': 'csv'}), first['task_id'])
+    assert start_export(client, admin_headers)['task_id'] != first['task_id']
+
+def test_failed_export_releases_its_claim(client, admin_headers, eager):
+    with patch('app.tasks.plan_partitions', side_effect=RuntimeError('database went away')):
+        failed = start_export(client, admin_headers)
+
+    retried = start_export(client, admin_headers)
+    assert not retried['deduplicated'] and retried['task_id'] != failed['task_id']
+
+def test_scheduled_export_gets_its_own_id(app, admin_headers, eager):
+    # The beat schedule passes no export_id
+    with app.app_context():
+        result = generate_service_requests_csv.apply()
+        export_id = result.get()['export_id']
+
+        # finish_export runs under export_id, so it must not share the parent's result
+        assert export_id != result.id
+        assert find_export(export_id) == (os.path.join(app.config['EXPORT_FOLDER'],
+                                                       f'service_requests_{export_id}.csv.gz'), 'csv')
+
+def test_export_rejects_bad_parameters(client, admin_headers):
+    for body in ({'export_format': 'xml'}, {'start_date': 'yesterday'},
+                 {'start_date': '2024-02-01', 'end_date': '2024-01-01'},
+                 {'mode': 'incremental'}, {'mode': 'incremental', 'consumer': '../bi'}):
+        assert client.post('/api/admin/exports/service-requests', headers=admin_headers, json=body).status_code == 400
+
+def test_unknown_or_unsafe_export_is_not_found(client, admin_headers):
+    assert client.get('/api/admin/exports/missing', headers=admin_headers).status_code == 404
+    assert client.get('/api/admin/exports/..%2F..%2Fconfig', headers=admin_headers).status_code == 404
+
+def test_cleanup_removes_expired_exports(app, tmp_path):
+    app.config.update(EXPORT_FOLDER=str(tmp_path), EXPORT_MAX_AGE=60)
+    old, fresh = tmp_path / 'service_requests_old.csv.gz', tmp_path / 'service_requests_new.csv.gz'
+    old.write_bytes(b'')
+    fresh.write_bytes(b'')
+    os.utime(old, (time.time() - 120, time.time() - 120))
+
+    with app.app_context():
+        assert cleanup_exports.apply().get() == 1
+    assert not old.exists() and fresh.exists()
@@ -0,0 +1,36 @@
+"""Check that the orjson and stdlib JSON backends produce the same bytes."""
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+import pytest
+
+from app.utils.json_provider import FastJSONProvider, orjson
+
+PAYLOAD = {
+    'name': 'Zoë Ångström',
+    'city': 'München',
+    'note': '配管工 ✓ 🚰',
+    'created_at': datetime(2024, 3, 1, 12, 30, 5, 123456),
+    'aware': datetime(2024, 3, 1, 12, 30, tzinfo=timezone.utc),
+    'day': date(2024, 3, 1),
+    'price': Decimal('19.90'),
+    'nested': [{'b': 2, 'a': 1}, None, True, 1.5],
+}
+
+def provider(app, backend):
+    app.config['JSON_BACKEND'] = backend
+    return FastJSONProvider(app)
+
+@pytest.mark.skipif(orjson is None, reason='orjson is not installed')
+@pytest.mark.parametrize('indent', [False, True])
+def test_backends_agree_on_non_ascii_payload(app, indent):
+    fast = provider(app, 'orjson').dumps_bytes(PAYLOAD, indent=indent)
+    stdlib = provider(app, 'stdlib').dumps_bytes(PAYLOAD, indent=indent)
+
+    assert fast == stdlib
+    assert 'Zoë'.encode('utf-8') in stdlib
+
+def test_stdlib_writes_utf8_not_escapes(app):
+    body = provider(app, 'stdlib').dumps_bytes({'name': 'Zoë'})
+
+    assert body == '{"name":"Zoë"}'.encode('utf-8')
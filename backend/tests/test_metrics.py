@@ -0,0 +1,33 @@
+"""Check the cache lookup metrics."""
+import pytest
+
+from app.auth.tokens import issue_tokens
+from app.extensions import db
+from app.models import User
+
+prometheus_client = pytest.importorskip('prometheus_client')
+
+def lookups(kind, result):
+    return prometheus_client.REGISTRY.get_sample_value(
+        'cache_lookups_total', {'kind': kind, 'result': result}
+    ) or 0
+
+@pytest.fixture
+def customer_headers(app):
+    with app.app_context():
+        customer = User(name='Customer', email='customer@example.com', password='pw', role='customer')
+        db.session.add(customer)
+        db.session.commit()
+        return {'Authorization': f'Bearer {issue_tokens(customer)[0]}'}
+
+def test_cached_view_counts_one_lookup_per_request(client, customer_headers):
+    before = {result: lookups('view', result) for result in ('hit', 'miss')}
+    internal = lookups('tag', 'hit') + lookups('auth', 'hit')
+
+    for _ in range(3):
+        assert client.get('/api/customer/dashboard', headers=customer_headers).status_code == 200
+
+    assert lookups('view', 'miss') - before['miss'] == 1
+    assert lookups('view', 'hit') - before['hit'] == 2
+    # Tag and token-version reads are counted under their own kinds
+    assert lookups('tag', 'hit') + lookups('auth', 'hit') > internal
@@ -0,0 +1,35 @@
+"""Check when stored password hashes are considered out of date."""
+import pytest
+
+from app.utils.passwords import hash_password, needs_rehash, normalize_method
+
+@pytest.mark.parametrize('method, normalized', [
+    ('scrypt', 'scrypt:32768:8:1'),
+    ('scrypt:16384', 'scrypt:16384:8:1'),
+    ('scrypt:16384:4', 'scrypt:16384:4:1'),
+    ('pbkdf2:sha512', None),
+    ('pbkdf2:sha256:600000', 'pbkdf2:sha256:600000'),
+])
+def test_normalize_method_fills_in_werkzeug_defaults(method, normalized):
+    if normalized is None:
+        assert normalize_method(method).startswith('pbkdf2:sha512:')
+    else:
+        assert normalize_method(method) == normalized
+
+def test_partial_method_does_not_rehash_every_login(app):
+    app.config.update(PASSWORD_HASH_METHOD='scrypt:16384', PASSWORD_SALT_LENGTH=16)
+    with app.app_context():
+        password_hash = hash_password('pw')
+        assert password_hash.startswith('scrypt:16384:8:1$')
+        assert not needs_rehash(password_hash)
+
+def test_changed_parameters_trigger_rehash(app):
+    with app.app_context():
+        password_hash = hash_password('pw')
+        assert not needs_rehash(password_hash)
+
+        app.config['PASSWORD_SALT_LENGTH'] = 24
+        assert needs_rehash(password_hash)
+
+        app.config.update(PASSWORD_SALT_LENGTH=16, PASSWORD_HASH_METHOD='scrypt:16384:8:1')
+        assert needs_rehash(password_hash)
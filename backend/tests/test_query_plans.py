@@ -0,0 +1,131 @@
+"""Check that the hot endpoints' queries are served by indexes.
+
+Runs on SQLite by default; set TEST_DATABASE_URL to a PostgreSQL database
+to check the same endpoints against Postgres.
+"""
+import re
+from datetime import datetime, timedelta
+
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+from sqlalchemy.orm import aliased
+
+from app.extensions import db
+from app.models import Review, Service, ServiceRequest, User
+
+HOT_TABLES = ('service_requests', 'reviews', 'users')
+
+# A full scan of a hot table, also under a SQLAlchemy alias (users_1). SQLite 3.36+ prints
+# only the alias, older versions 'SCAN TABLE users AS users_1'; lines that go on to name
+# an index (USING [COVERING] INDEX) are index scans and don't match
+FULL_SCANS = [re.compile(rf'SCAN (TABLE )?{table}(_\d+)?( AS \w+)?$') for table in HOT_TABLES]
+
+# Filtered or paged reads; unfiltered listings and counts legitimately read the whole table
+SELECTIVE = re.compile(r'\b(WHERE|LIMIT)\b', re.IGNORECASE)
+
+ENDPOINTS = [
+    ('admin', '/api/admin/bookings?status=pending'),
+    ('admin', '/api/admin/bookings?limit=5'),
+    ('admin', '/api/admin/users?role=professional'),
+    ('admin', '/api/admin/professionals/pending'),
+    ('admin', '/api/admin/search/professionals?service_type=Plumbing'),
+    ('customer', '/api/customer/professionals/1'),
+    ('customer', '/api/customer/dashboard'),
+    ('customer', '/api/customer/requests'),
+    ('customer', '/api/customer/requests?status=pending&limit=5'),
+    ('customer', '/api/customer/stats'),
+    ('professional', '/api/professional/dashboard'),
+    ('professional', '/api/professional/requests?status=accepted'),
+]
+
+@pytest.fixture
+def tokens(app):
+    with app.app_context():
+        admin = User(name='Admin', email='admin@example.com', password='pw', role='admin')
+        customer = User(name='Customer', email='customer@example.com', password='pw', role='customer')
+        professional = User(name='Pro', email='pro@example.com', password='pw', role='professional',
+                            services=['Plumbing'])
+        professional.is_approved = True
+        service = Service(name='Plumbing', category='Home', base_price=100.0)
+        db.session.add_all([admin, customer, professional, service])
+        db.session.commit()
+
+        statuses = ['pending', 'accepted', 'completed', 'cancelled']
+        for i in range(20):
+            db.session.add(ServiceRequest(
+                customer_id=customer.id, service_id=service.id, professional_id=professional.id,
+                status=statuses[i % 4], address='1 Main St',
+                preferred_date=datetime(2024, 1, 1), created_at=datetime(2024, 1, 1) + timedelta(hours=i)
+            ))
+        db.session.commit()
+        completed = ServiceRequest.query.filter_by(status='completed').first()
+        db.session.add(Review(user_id=customer.id, professional_id=professional.id,
+                              service_request_id=completed.id, rating=5))
+        db.session.commit()
+
+        return {
+            'admin': create_access_token(identity=admin.id),
+            'customer': create_access_token(identity=customer.id),
+            'professional': create_access_token(identity=professional.id),
+        }
+
+def capture_statements(app, client, path, token):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        response = client.get(path, headers={'Authorization': f'Bearer {token}'})
+        response.get_data()
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return statements
+
+def unindexed_scans(statement, parameters):
+    """Return plan lines showing a full table scan of a hot table."""
+    connection = db.session.connection()
+    if connection.dialect.name == 'sqlite':
+        rows = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).all()
+        lines = [row[-1] for row in rows]
+        return [line for line in lines if any(scan.match(line) for scan in FULL_SCANS)]
+
+    # Tiny test tables would always be seq-scanned, so ask whether an index is usable at all
+    connection.exec_driver_sql('SET LOCAL enable_seqscan = off')
+    lines = [row[0] for row in connection.exec_driver_sql(f'EXPLAIN {statement}', parameters)]
+    return [line for line in lines
+            if any(f'Seq Scan on {table}' in line for table in HOT_TABLES)]
+
+@pytest.mark.parametrize('role,path', ENDPOINTS)
+def test_hot_endpoint_queries_use_indexes(app, client, tokens, role, path):
+    statements = capture_statements(app, client, path, tokens[role])
+    assert statements
+
+    with app.app_context():
+        for statement, parameters in statements:
+            if not SELECTIVE.search(statement):
+                continue
+            assert not unindexed_scans(statement, parameters), statement
+
+def test_aliased_full_scan_is_caught(app, tokens):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            customer = aliased(User)
+            db.session.query(customer.id).filter(customer.name == 'Customer').all()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+
+        (statement, parameters), = statements
+        assert unindexed_scans(statement, parameters), statement
@@ -0,0 +1,48 @@
+"""Check the per-request SQL instrumentation: Server-Timing, N+1 shapes and budgets."""
+import logging
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from app.extensions import db
+from app.models import User
+from app.utils.sql_stats import QueryBudgetExceeded, statement_shape
+
+@pytest.fixture
+def customer_headers(app):
+    with app.app_context():
+        customer = User(name='Customer', email='customer@example.com', password='pw', role='customer')
+        db.session.add(customer)
+        db.session.commit()
+        token = create_access_token(identity=customer.id, additional_claims=customer.token_claims())
+    return {'Authorization': f'Bearer {token}'}
+
+def test_server_timing_reports_query_count(client, customer_headers):
+    response = client.get('/api/customer/requests', headers=customer_headers)
+
+    assert response.status_code == 200
+    timing = response.headers['Server-Timing']
+    assert timing.startswith('db;dur=')
+    assert 'queries"' in timing and 'app;dur=' in timing
+
+def test_budget_raises_under_testing(app, client, customer_headers):
+    app.config['SQL_QUERY_BUDGETS'] = {'customer.get_requests': 0}
+
+    with pytest.raises(QueryBudgetExceeded):
+        client.get('/api/customer/requests', headers=customer_headers)
+
+def test_budget_logs_in_production(app, client, customer_headers, caplog):
+    app.config['SQL_QUERY_BUDGETS'] = {'customer.get_requests': 0}
+    app.testing = False
+
+    with caplog.at_level(logging.WARNING, logger='app.utils.sql_stats'):
+        response = client.get('/api/customer/requests', headers=customer_headers)
+
+    assert response.status_code == 200
+    assert 'budget exceeded' in caplog.text
+
+def test_statement_shape_ignores_in_list_length():
+    assert statement_shape('SELECT * FROM users\n WHERE id IN (?, ?, ?)') == \
+        statement_shape('SELECT * FROM users WHERE id IN (?)')
+    assert statement_shape('SELECT * FROM users WHERE id IN (%(id_1_1)s, %(id_1_2)s)') == \
+        'SELECT * FROM users WHERE id IN (?)'
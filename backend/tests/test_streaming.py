@@ -0,0 +1,60 @@
+"""Check how streamed listings report errors before and after the body starts."""
+import logging
+from unittest.mock import patch
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from app.extensions import db
+from app.models import User
+
+@pytest.fixture
+def admin_headers(app):
+    with app.app_context():
+        admin = User(name='Admin', email='admin@example.com', password='pw', role='admin')
+        db.session.add(admin)
+        db.session.add_all(
+            User(name=f'Customer {i}', email=f'customer{i}@example.com', password='pw', role='customer')
+            for i in range(5)
+        )
+        db.session.commit()
+        token = create_access_token(identity=admin.id, additional_claims=admin.token_claims())
+    return {'Authorization': f'Bearer {token}'}
+
+def failing_to_dict(fail_after):
+    calls = []
+    original = User.to_dict
+
+    def to_dict(user):
+        calls.append(user.id)
+        if len(calls) > fail_after:
+            raise RuntimeError('cannot serialize')
+        return original(user)
+    return to_dict
+
+def test_listing_is_streamed(app, client, admin_headers):
+    app.config['STREAM_BATCH_SIZE'] = 2
+    response = client.get('/api/admin/users', headers=admin_headers)
+
+    assert response.status_code == 200 and response.is_streamed
+    assert len(response.get_json()) == 6
+
+def test_error_in_first_batch_is_a_500(app, client, admin_headers):
+    app.config['STREAM_BATCH_SIZE'] = 2
+    with patch.object(User, 'to_dict', failing_to_dict(0)):
+        response = client.get('/api/admin/users', headers=admin_headers)
+
+    assert response.status_code == 500
+    assert response.get_json() == {'error': 'cannot serialize'}
+
+def test_error_mid_stream_is_logged_and_raised(app, client, admin_headers, caplog):
+    app.config['STREAM_BATCH_SIZE'] = 2
+    with patch.object(User, 'to_dict', failing_to_dict(2)), caplog.at_level(logging.ERROR):
+        response = client.get('/api/admin/users', headers=admin_headers)
+        assert response.status_code == 200
+        # The body can't be completed; the connection is aborted instead of ending with valid JSON
+        with pytest.raises(RuntimeError):
+            response.get_data()
+        response.close()
+
+    assert 'streamed response of admin.get_users failed' in caplog.text
@@ -0,0 +1,118 @@
+"""Check the scheduled email jobs end to end with Celery in eager mode."""
+from datetime import datetime, timedelta
+
+import pytest
+
+from sqlalchemy import event
+
+from app.extensions import db
+from app.models import Service, ServiceRequest, User
+from app.tasks import (
+    monthly_stats, send_daily_reminders, send_monthly_reports, send_reminder_chunk, send_report_chunk
+)
+
+def make_request(customer, service, professional=None, status='pending'):
+    return ServiceRequest(
+        customer_id=customer.id, service_id=service.id,
+        professional_id=professional.id if professional else None, status=status,
+        address='1 Main St', preferred_date=datetime(2024, 1, 1)
+    )
+
+def test_daily_reminders_fan_out_in_chunks(app, sink, eager):
+    app.config['REMINDER_CHUNK_SIZE'] = 2
+    with app.app_context():
+        customer = User(name='Customer', email='customer@example.com', password='pw', role='customer')
+        professionals = [
+            User(name=f'Pro {i}', email=f'pro{i}@example.com', password='pw', role='professional')
+            for i in range(5)
+        ]
+        service = Service(name='Plumbing', category='home', base_price=50)
+        db.session.add_all([customer, service, *professionals])
+        db.session.flush()
+        # pro4 has nothing pending and gets no reminder
+        db.session.add_all([make_request(customer, service, p) for p in professionals[:4]])
+        db.session.add(make_request(customer, service, professionals[0]))
+        db.session.add(make_request(customer, service, professionals[4], status='accepted'))
+        db.session.commit()
+
+        result = send_daily_reminders.apply().get()
+
+    assert result == {'professionals': 4, 'chunks': 2}
+    assert sorted(sink.messages) == [[f'pro{i}@example.com'] for i in range(4)]
+
+def test_monthly_stats_are_aggregated_in_sql(app):
+    with app.app_context():
+        customer = User(name='Customer', email='customer@example.com', password='pw', role='customer')
+        cheap = Service(name='Cleaning', category='home', base_price=20)
+        dear = Service(name='Plumbing', category='home', base_price=75)
+        db.session.add_all([customer, cheap, dear])
+        db.session.flush()
+        for service, status, day in [
+            (cheap, 'completed', 3), (dear, 'completed', 10), (dear, 'pending', 12),
+            (cheap, 'cancelled', 20), (dear, 'completed', 45)  # outside the window
+        ]:
+            r = make_request(customer, service, status=status)
+            r.created_at = datetime(2024, 1, 1) + timedelta(days=day)
+            db.session.add(r)
+        db.session.commit()
+
+        stats = monthly_stats([customer.id], datetime(2024, 1, 1), datetime(2024, 2, 1))
+
+    assert stats == {customer.id: {
+        'total_requests': 4, 'completed_requests': 2, 'pending_requests': 1,
+        'cancelled_requests': 1, 'total_spent': 95
+    }}
+
+def test_monthly_reports_reach_every_customer(app, sink, eager):
+    app.config['MONTHLY_REPORT_CHUNK_SIZE'] = 2
+    with app.app_context():
+        db.session.add_all([
+            User(name=f'Customer {i}', email=f'customer{i}@example.com', password='pw', role='customer')
+            for i in range(3)
+        ])
+        db.session.commit()
+
+        result = send_monthly_reports.apply().get()
+
+    assert result == {'customers': 3, 'chunks': 2}
+    assert sorted(sink.messages) == [[f'customer{i}@example.com'] for i in range(3)]
+
+def count_queries(task, *args):
+    """Run task inline and return how many SQL statements it issued."""
+    statements = []
+    record = lambda *a: statements.append(a[2])
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        task.apply(args=args).get()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    return len(statements)
+
+def seed_chunk(count):
+    """count professionals and customers, each pro with two pending requests from its own customer."""
+    service = Service(name='Plumbing', category='home', base_price=50)
+    db.session.add(service)
+    pros, customers = [], []
+    for i in range(count):
+        pros.append(User(name=f'Pro {i}', email=f'pro{i}@example.com', password='pw', role='professional'))
+        customers.append(User(name=f'Customer {i}', email=f'customer{i}@example.com', password='pw', role='customer'))
+    db.session.add_all(pros + customers)
+    db.session.flush()
+    for pro, customer in zip(pros, customers):
+        for _ in range(2):
+            r = make_request(customer, service, pro)
+            r.created_at = datetime(2024, 1, 10)
+            db.session.add(r)
+    db.session.commit()
+    ids = [p.id for p in pros], [c.id for c in customers]
+    # Start each chunk from a cold session, as a worker would
+    db.session.expunge_all()
+    return ids
+
+@pytest.mark.parametrize('count', [5, 40])
+def test_chunks_issue_a_constant_number_of_queries(app, sink, count):
+    with app.app_context():
+        pro_ids, customer_ids = seed_chunk(count)
+        assert count_queries(send_reminder_chunk, pro_ids) == 4
+        assert count_queries(send_report_chunk, customer_ids, '2024-01-01T00:00:00', '2024-02-01T00:00:00') == 4
+    assert len(sink.messages) == 2 * count
@@ -0,0 +1,77 @@
+"""Check that issued tokens are revoked when the claims they carry change."""
+import pytest
+from flask_jwt_extended import create_access_token
+
+from app.auth.tokens import issue_tokens
+from app.extensions import db
+from app.models import User
+
+def bearer(token):
+    return {'Authorization': f'Bearer {token}'}
+
+@pytest.fixture
+def users(app):
+    with app.app_context():
+        admin = User(name='Admin', email='admin@example.com', password='pw', role='admin')
+        pro = User(name='Pro', email='pro@example.com', password='pw', role='professional')
+        other = User(name='Other', email='other@example.com', password='pw', role='professional')
+        db.session.add_all([admin, pro, other])
+        db.session.commit()
+        # Returned outside the context: requests must each get their own app context and g
+        return {
+            'admin': bearer(issue_tokens(admin)[0]),
+            'pro': bearer(issue_tokens(pro)[0]),
+            'other': bearer(issue_tokens(other)[0]),
+            'pro_id': pro.id,
+            'admin_id': admin.id,
+        }
+
+def test_token_works_until_revoked(client, users):
+    assert client.get('/api/professional/requests', headers=users['pro']).status_code == 200
+
+@pytest.mark.parametrize('change', [
+    lambda client, users: client.post(f"/api/admin/professionals/{users['pro_id']}/block", headers=users['admin']),
+    lambda client, users: client.put(f"/api/admin/users/{users['pro_id']}/toggle-status", headers=users['admin']),
+    lambda client, users: client.put(f"/api/admin/users/{users['pro_id']}", headers=users['admin'],
+                                     json={'role': 'customer'}),
+], ids=['block', 'approval', 'role'])
+def test_claim_change_revokes_issued_tokens(client, users, change):
+    assert change(client, users).status_code == 200
+
+    response = client.get('/api/professional/requests', headers=users['pro'])
+    assert response.status_code == 401
+    # Other users' tokens are unaffected
+    assert client.get('/api/professional/requests', headers=users['other']).status_code == 200
+
+def test_change_through_expired_instance_revokes(app, client, users):
+    with app.app_context():
+        pro = db.session.get(User, users['pro_id'])
+        db.session.commit()  # expire it, as a task or multi-step route would
+        pro.role = 'customer'
+        db.session.commit()
+
+    assert client.get('/api/auth/me', headers=users['pro']).status_code == 401
+
+def test_unrelated_change_keeps_tokens(client, users):
+    response = client.put(f"/api/admin/users/{users['pro_id']}", headers=users['admin'], json={'name': 'Renamed'})
+    assert response.status_code == 200
+    assert client.get('/api/professional/requests', headers=users['pro']).status_code == 200
+
+def test_deleted_user_token_is_revoked(app, client, users):
+    with app.app_context():
+        db.session.delete(db.session.get(User, users['pro_id']))
+        db.session.commit()
+
+    assert client.get('/api/auth/me', headers=users['pro']).status_code == 401
+
+def test_legacy_token_without_version_falls_back_to_the_database(app, client, users):
+    with app.app_context():
+        legacy = bearer(create_access_token(identity=users['pro_id']))
+        legacy_admin = bearer(create_access_token(identity=users['admin_id']))
+
+    # Accepted, with role and account state read from the user row
+    assert client.get('/api/professional/requests', headers=legacy).status_code == 200
+    assert client.get('/api/admin/dashboard', headers=legacy).status_code == 403
+
+    assert client.post(f"/api/admin/professionals/{users['pro_id']}/block", headers=legacy_admin).status_code == 200
+    assert client.get('/api/professional/requests', headers=legacy).status_code == 403